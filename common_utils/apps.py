@@ -6,3 +6,4 @@ class CommonUtilsConfig(AppConfig):
 
     def ready(self):
         import common_utils.audit_logging  # noqa isort:skip
+        import common_utils.notifications  # noqa isort:skip
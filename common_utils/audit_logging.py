@@ -98,6 +98,44 @@ def log(action, instance):
     logger.info(json.dumps(message))
 
 
+def log_bulk(action, profile_part, profile_ids, user=None):
+    """Log a single audit event covering an operation on many profiles.
+
+    The acting user can be given explicitly for code run outside of the request cycle,
+    e.g. when streaming a response.
+    """
+    if not (settings.AUDIT_LOGGING_ENABLED and profile_ids):
+        return
+
+    current_time = timezone.now()
+    current_user = user or get_current_user()
+
+    message = {
+        "audit_event": {
+            "origin": "JASSARI-BE",
+            "operation": action,
+            "status": "SUCCESS",
+            "date_time_epoch": int(current_time.timestamp()),
+            "date_time": f"{current_time.replace(tzinfo=None).isoformat(sep='T', timespec='milliseconds')}Z",
+            "actor": {"role": "ADMIN" if current_user else "SYSTEM"},
+            "actor_service": {
+                "id": "youth_membership",
+                "name": "Youth Membership",
+            },
+            "target": {
+                "profile_ids": [str(profile_id) for profile_id in profile_ids],
+                "profile_part": profile_part,
+            },
+        }
+    }
+
+    _format_user_data(message["audit_event"], "actor", current_user)
+
+    _format_extra_info(message["audit_event"])
+
+    logger.info(json.dumps(message))
+
+
 def log_auth(action, user=None, error=None):
     if not settings.AUDIT_LOGGING_ENABLED:
         return
@@ -1,4 +1,54 @@
+import json
+from functools import partial
+
 import graphene
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router
+from django.db.models import Q, QuerySet
+from graphene.relay import PageInfo
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import maybe_queryset
+from graphql import GraphQLError
+from graphql_relay.utils import base64, unbase64
+
+KEYSET_CURSOR_PREFIX = "keyset:"
+
+
+def estimate_row_count(model):
+    """Return the Postgres planner's row estimate for the model's table.
+
+    The estimate is kept up to date by autovacuum / ANALYZE. None is returned if the
+    table has never been analyzed.
+    """
+    connection = connections[router.db_for_read(model)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if not row or row[0] < 0:
+        return None
+    return row[0]
+
+
+def get_total_count(model):
+    """Return a cheap total row count for the model.
+
+    Large tables are counted using the planner's estimate, small tables exactly. The
+    result is cached for `GRAPHQL_TOTAL_COUNT_CACHE_TIMEOUT` seconds, which is the
+    upper bound for how stale the returned value can be.
+    """
+    cache_key = f"graphql:total_count:{model._meta.label_lower}"
+    count = cache.get(cache_key)
+    if count is None:
+        count = estimate_row_count(model)
+        if count is None or count < settings.GRAPHQL_TOTAL_COUNT_EXACT_THRESHOLD:
+            count = model.objects.count()
+        cache.set(cache_key, count, settings.GRAPHQL_TOTAL_COUNT_CACHE_TIMEOUT)
+    return count
 
 
 class CountConnection(graphene.Connection):
@@ -10,12 +60,143 @@ class CountConnection(graphene.Connection):
         required=True,
     )
     total_count = graphene.Int(
-        description="Total count of nodes on this connection regardless of filters",
+        description="Total count of nodes on this connection regardless of filters. "
+        "For large result sets the value may be an estimate.",
         required=True,
     )
 
     def resolve_count(self, info):
-        return self.length
+        if getattr(self, "length", None) is not None:
+            return self.length
+        if isinstance(self.iterable, QuerySet):
+            # Single COUNT(*) without fetching the rows
+            return self.iterable.count()
+        return len(self.iterable)
 
     def resolve_total_count(self, info, **kwargs):
-        return self.iterable.model.objects.count()
+        return get_total_count(self.iterable.model)
+
+
+def keyset_to_cursor(values):
+    return base64(KEYSET_CURSOR_PREFIX + json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def cursor_to_keyset(cursor):
+    try:
+        value = unbase64(cursor)
+    except Exception:
+        return None
+    prefix, separator, keyset = value.partition(KEYSET_CURSOR_PREFIX)
+    if prefix or not separator:
+        return None
+    try:
+        return json.loads(keyset)
+    except ValueError:
+        return None
+
+
+def keyset_filter(fields, values):
+    """Build a filter selecting the rows which come after `values` in `fields` order.
+
+    The leading `>=` condition on the first field lets the database use a range scan
+    on the matching composite index.
+    """
+    condition = Q()
+    for i, field in enumerate(fields):
+        equal_fields = dict(zip(fields[:i], values[:i]))
+        condition |= Q(**equal_fields, **{f"{field}__gt": values[i]})
+    return Q(**{f"{fields[0]}__gte": values[0]}) & condition
+
+
+class KeysetDjangoFilterConnectionField(DjangoFilterConnectionField):
+    """Filter connection field that supports keyset pagination.
+
+    When the `keyset` argument is true, results are ordered by `keyset_fields` and the
+    cursors encode the ordering key of the edge instead of its offset. Fetching any page
+    then costs the same as fetching the first one. Keyset pagination only supports
+    paginating forwards using `first` and `after`. Without the argument the default
+    offset based cursors are used.
+    """
+
+    def __init__(self, type, *args, keyset_fields=("pk",), **kwargs):
+        kwargs.setdefault(
+            "keyset",
+            graphene.Boolean(
+                description="Use keyset pagination. The results are returned in a stable "
+                "order and the cursors are only valid in keyset mode."
+            ),
+        )
+        self.keyset_fields = tuple(keyset_fields)
+        super().__init__(type, *args, **kwargs)
+
+    def get_queryset_resolver(self):
+        return partial(
+            super().get_queryset_resolver(), keyset_fields=self.keyset_fields
+        )
+
+    @classmethod
+    def resolve_queryset(
+        cls, connection, iterable, info, args, keyset_fields=None, **kwargs
+    ):
+        qs = super().resolve_queryset(connection, iterable, info, args, **kwargs)
+        if args.get("keyset") and keyset_fields:
+            qs = qs.order_by(*keyset_fields)
+        return qs
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        if not args.get("keyset"):
+            return super().resolve_connection(
+                connection, args, iterable, max_limit=max_limit
+            )
+
+        if args.get("last") or args.get("before"):
+            raise GraphQLError(
+                "Keyset pagination only supports the `first` and `after` arguments."
+            )
+
+        iterable = maybe_queryset(iterable)
+        keyset_fields = iterable.query.order_by
+        first = args.get("first") or max_limit
+        if max_limit is not None:
+            first = min(first, max_limit)
+
+        page = iterable
+        after = args.get("after")
+        if after:
+            after_values = cursor_to_keyset(after)
+            if not isinstance(after_values, list) or len(after_values) != len(
+                keyset_fields
+            ):
+                raise GraphQLError("Invalid cursor.")
+            page = page.filter(keyset_filter(keyset_fields, after_values))
+        if first is not None:
+            page = page[: first + 1]
+
+        nodes = list(page)
+        has_next_page = first is not None and len(nodes) > first
+        if has_next_page:
+            nodes = nodes[:first]
+
+        edges = [
+            connection.Edge(
+                node=node,
+                cursor=keyset_to_cursor(
+                    [getattr(node, field) for field in keyset_fields]
+                ),
+            )
+            for node in nodes
+        ]
+        result = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=bool(after),
+                has_next_page=has_next_page,
+            ),
+        )
+        # The filtered count is resolved lazily, only if the client asks for it
+        result.iterable = iterable
+        result.length = None
+        return result
@@ -0,0 +1,130 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import get_connection
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Q
+from mailer.engine import ensure_message_id
+from mailer.models import (
+    get_message_id,
+    Message,
+    MessageLog,
+    PRIORITY_DEFERRED,
+    RESULT_FAILURE,
+    RESULT_SUCCESS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_mailer_backend():
+    """Return the backend used for sending the messages in the mail queue."""
+    backend = getattr(
+        settings,
+        "MAILER_EMAIL_BACKEND",
+        "django.core.mail.backends.smtp.EmailBackend",
+    )
+    if backend == settings.EMAIL_BACKEND == "mailer.backend.DbBackend":
+        raise ImproperlyConfigured(
+            "EMAIL_BACKEND and MAILER_EMAIL_BACKEND can't both be "
+            '"mailer.backend.DbBackend".'
+        )
+    return backend
+
+
+def send_queued_mail(batch_size=100):
+    """Send the next batch of messages in the django-mailer queue.
+
+    The batch is claimed with one SELECT ... FOR UPDATE SKIP LOCKED query, so
+    concurrent workers send different messages, and it's sent using a single
+    connection. Each message is deleted or deferred right after sending it, in a
+    savepoint of its own, so a failing write only leaves that message in the queue.
+    The locks are held until the batch is done, and if the final commit fails the
+    whole batch is sent again, which the batch size limits. Sent and failed
+    messages are logged like django-mailer's send_all does.
+
+    Return the number of sent and failed messages.
+    """
+    backend = get_mailer_backend()
+    sent = failed = 0
+
+    with transaction.atomic():
+        messages = list(
+            Message.objects.non_deferred()
+            .select_for_update(skip_locked=True)
+            .order_by("priority", "when_added")[:batch_size]
+        )
+        if not messages:
+            return 0, 0
+
+        connection = get_connection(backend=backend)
+        try:
+            for message in messages:
+                email, error = _send(message, connection)
+                _save_result(message, email, error)
+                if error is None:
+                    sent += 1
+                else:
+                    failed += 1
+        finally:
+            connection.close()
+
+    return sent, failed
+
+
+def _save_result(message, email, error):
+    """Delete or defer the message and log the result."""
+    pk = message.pk
+    try:
+        with transaction.atomic():
+            if email is None or error is None:
+                # Messages which can't be read are discarded
+                message.delete()
+            else:
+                message.defer()
+            if email is not None:
+                _log_entry(message, email, error).save()
+    except DatabaseError:
+        logger.exception(f"Saving the result of message {pk} failed.")
+
+
+def _send(message, connection):
+    """Send the message, returning its email and error, if any."""
+    email = message.email
+    if email is None:
+        logger.warning(f"Discarding message {message.pk} which can't be read.")
+        return None, "The message can't be read."
+
+    try:
+        # Does nothing if the connection is already open
+        connection.open()
+        email.connection = connection
+        ensure_message_id(email)
+        email.send()
+    except Exception as e:
+        logger.warning(f"Sending message {message.pk} failed: {e}")
+        # The connection may be broken
+        connection.close()
+        return email, str(e)
+    return email, None
+
+
+def _log_entry(message, email, error):
+    return MessageLog(
+        message_data=message.message_data,
+        message_id=get_message_id(email),
+        when_added=message.when_added,
+        priority=message.priority,
+        result=RESULT_SUCCESS if error is None else RESULT_FAILURE,
+        log_message=error or "",
+    )
+
+
+def get_queue_depth():
+    """Return the number of waiting and deferred messages in the mail queue."""
+    deferred = Q(priority=PRIORITY_DEFERRED)
+    depth = Message.objects.aggregate(
+        waiting=Count("pk", filter=~deferred), deferred=Count("pk", filter=deferred)
+    )
+    return depth["waiting"], depth["deferred"]
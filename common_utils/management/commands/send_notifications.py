@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from common_utils.notifications import send_outbox_notifications
+
+
+class Command(BaseCommand):
+    help = "Send the notifications waiting in the notification outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of notifications to send in one transaction",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep waiting for new notifications instead of exiting",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait when there are no notifications to send",
+        )
+
+    def handle(self, *args, **kwargs):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_outbox_notifications(kwargs["batch_size"])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} notifications, {failed} failed")
+                total_sent += sent
+                total_failed += failed
+            if sent + failed < kwargs["batch_size"]:
+                if not kwargs["loop"]:
+                    break
+                time.sleep(kwargs["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {total_sent} notifications, {total_failed} failed"
+            )
+        )
@@ -0,0 +1,135 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from mailer.models import Message
+
+from common_utils.mail_queue import (
+    get_mailer_backend,
+    get_queue_depth,
+    send_queued_mail,
+)
+
+
+class Command(BaseCommand):
+    help = "Send the messages in the mail queue in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of messages to send using one connection",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes sending batches at the same time",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep waiting for new messages instead of exiting",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait when there are no messages to send",
+        )
+        parser.add_argument(
+            "--retry-deferred-interval",
+            type=float,
+            help=(
+                "Seconds between moving the deferred messages back to the queue, "
+                "which is first done when the command starts. By default deferred "
+                "messages aren't retried."
+            ),
+        )
+        parser.add_argument(
+            "--report-interval",
+            type=float,
+            default=10,
+            help="Seconds between the progress reports",
+        )
+
+    def handle(self, *args, **kwargs):
+        # Fail before starting the workers if the backends are misconfigured
+        get_mailer_backend()
+
+        self._report_interval = kwargs["report_interval"]
+        self._retry_deferred_interval = kwargs["retry_deferred_interval"]
+        self._retried = None
+        self._started = self._reported = time.perf_counter()
+        self._sent = self._failed = 0
+
+        if kwargs["workers"] > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                kwargs["workers"], initializer=django.setup
+            ) as executor:
+                self._send_in_workers(executor, kwargs)
+        else:
+            while True:
+                self._retry_deferred()
+                sent, failed = send_queued_mail(kwargs["batch_size"])
+                self._count(sent, failed)
+                if sent + failed < kwargs["batch_size"]:
+                    if not kwargs["loop"]:
+                        break
+                    time.sleep(kwargs["interval"])
+
+        self.stdout.write(self.style.SUCCESS(self._progress()))
+
+    def _send_in_workers(self, executor, kwargs):
+        pending = set()
+        queue_empty = False
+        while True:
+            self._retry_deferred()
+            while not queue_empty and len(pending) < kwargs["workers"]:
+                pending.add(executor.submit(send_queued_mail, kwargs["batch_size"]))
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                sent, failed = future.result()
+                self._count(sent, failed)
+                if sent + failed < kwargs["batch_size"]:
+                    queue_empty = True
+
+            if queue_empty and not pending:
+                if not kwargs["loop"]:
+                    break
+                time.sleep(kwargs["interval"])
+                queue_empty = False
+
+    def _retry_deferred(self):
+        if self._retry_deferred_interval is None:
+            return
+        now = time.perf_counter()
+        if (
+            self._retried is None
+            or now - self._retried >= self._retry_deferred_interval
+        ):
+            self._retried = now
+            retried = Message.objects.retry_deferred()
+            if retried:
+                self.stdout.write(f"Retrying {retried} deferred messages")
+
+    def _count(self, sent, failed):
+        self._sent += sent
+        self._failed += failed
+        now = time.perf_counter()
+        if now - self._reported >= self._report_interval:
+            self._reported = now
+            self.stdout.write(self._progress())
+
+    def _progress(self):
+        elapsed = time.perf_counter() - self._started
+        waiting, deferred = get_queue_depth()
+        return (
+            f"Sent {self._sent} messages ({self._sent / elapsed:.0f}/s), "
+            f"{self._failed} failed. Queue: {waiting} waiting, {deferred} deferred"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.18 on 2026-10-19 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common_utils", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="outboxnotification",
+            name="email",
+            field=models.EmailField(blank=True, max_length=254),
+        ),
+    ]
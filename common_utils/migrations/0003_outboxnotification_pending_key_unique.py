@@ -0,0 +1,26 @@
+# Generated by Django 2.2.18 on 2026-10-19 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("common_utils", "0002_outboxnotification_email_blank"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="outboxnotification",
+            name="key",
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name="outboxnotification",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(next_attempt_at__isnull=False),
+                fields=("key",),
+                name="outbox_pending_key_unique",
+            ),
+        ),
+    ]
@@ -1,6 +1,9 @@
 import uuid
 
+from django.contrib.postgres.fields import JSONField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
 
 class UUIDModel(models.Model):
@@ -8,3 +11,75 @@ class UUIDModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class ValidateOnSaveModel(models.Model):
+    """Model which validates its fields when saved.
+
+    Only the fields being written are validated, so partial saves with update_fields
+    skip the other fields. Uniqueness and related objects are left to the database
+    constraints instead of checking them with extra queries.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.validate_fields(kwargs.get("update_fields"))
+        return super().save(*args, **kwargs)
+
+    def validate_fields(self, update_fields=None):
+        """Validate the fields which would be written by save(update_fields=...)."""
+        exclude = [
+            field.name
+            for field in self._meta.fields
+            if field.is_relation
+            or (
+                update_fields is not None
+                and field.name not in update_fields
+                and field.attname not in update_fields
+            )
+        ]
+        self.full_clean(exclude=exclude, validate_unique=False)
+
+
+class OutboxNotification(models.Model):
+    """A notification waiting to be sent, written in the transaction causing it.
+
+    The send_notifications command renders the notifications into the mail queue
+    after the transaction is committed. The key identifies the notification, so the
+    same notification is written only once while it's waiting to be sent. The email
+    address and context are cleared once the notification is sent or no longer
+    retried.
+    """
+
+    key = models.CharField(max_length=64)
+    notification_type = models.CharField(max_length=50)
+    email = models.EmailField(blank=True)
+    language = models.CharField(max_length=10)
+    context = JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Null once the notification has been sent or the attempts have run out
+    next_attempt_at = models.DateTimeField(null=True, default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                name="outbox_pending_idx",
+                condition=models.Q(next_attempt_at__isnull=False),
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["key"],
+                name="outbox_pending_key_unique",
+                condition=models.Q(next_attempt_at__isnull=False),
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.notification_type} to {self.email}"
@@ -0,0 +1,310 @@
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+from enum import Enum
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.html import strip_tags
+from django_ilmoitin.models import NotificationTemplate
+from django_ilmoitin.utils import DEFAULT_LANGUAGE, send_mail
+from jinja2 import StrictUndefined
+from jinja2.exceptions import TemplateError
+from jinja2.sandbox import SandboxedEnvironment
+from mailer.engine import send_all
+from mailer.models import Message
+from parler.utils.context import switch_language
+
+from .models import OutboxNotification
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_TEMPLATES_VERSION_CACHE_KEY = "common_utils:notification_templates:version"
+
+# Attributes of the model instances in notification contexts used by the templates.
+# Only these are stored in the outbox.
+TEMPLATE_MODEL_ATTRIBUTES = (
+    "approver_first_name",
+    "approval_token",
+    "profile_access_token",
+)
+
+CompiledTemplate = namedtuple(
+    "CompiledTemplate",
+    (
+        "subject",
+        "body_html",
+        "body_text",
+        "admin_emails",
+        "admin_subject",
+        "admin_text",
+    ),
+)
+
+
+class NotificationTemplateCache:
+    """Notification templates compiled by this process, by type and language.
+
+    Changes to the templates in any process replace a version number in the shared
+    cache, and the compiled templates are dropped when the version changes. Sending
+    a notification then costs a cache lookup and a render instead of fetching the
+    template and its translation and compiling them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._version = None
+        self._env = SandboxedEnvironment(
+            trim_blocks=True, lstrip_blocks=True, undefined=StrictUndefined
+        )
+
+    def get(self, notification_type, language):
+        """Return the compiled template, or None if there's no such template."""
+        version = cache.get(NOTIFICATION_TEMPLATES_VERSION_CACHE_KEY)
+        with self._lock:
+            if version != self._version:
+                self._templates = {}
+                self._version = version
+            key = (notification_type, language)
+            if key not in self._templates:
+                self._templates[key] = self._compile(notification_type, language)
+            return self._templates[key]
+
+    def clear(self):
+        with self._lock:
+            self._templates = {}
+
+    def invalidate(self):
+        """Drop the compiled templates of all processes."""
+        self.clear()
+        transaction.on_commit(
+            lambda: cache.set(
+                NOTIFICATION_TEMPLATES_VERSION_CACHE_KEY, uuid.uuid4().hex, None
+            )
+        )
+
+    def _compile(self, notification_type, language):
+        template = (
+            NotificationTemplate.objects.prefetch_related("admins_to_notify")
+            .filter(type=notification_type)
+            .first()
+        )
+        if not template:
+            return None
+
+        admin_emails = []
+        if template.admin_notification_subject and template.admin_notification_text:
+            admin_emails = [admin.email for admin in template.admins_to_notify.all()]
+
+        with switch_language(template, language):
+            try:
+                return CompiledTemplate(
+                    self._env.from_string(template.subject),
+                    self._env.from_string(template.body_html),
+                    self._env.from_string(template.body_text)
+                    if template.body_text
+                    else None,
+                    admin_emails,
+                    template.admin_notification_subject,
+                    template.admin_notification_text,
+                )
+            except NotificationTemplate.DoesNotExist:
+                # No translation in the language or its fallbacks
+                return None
+
+
+notification_templates = NotificationTemplateCache()
+
+
+class NotificationNotSent(Exception):
+    pass
+
+
+def send_notification(
+    email, notification_type, context=None, language=DEFAULT_LANGUAGE
+):
+    """Send a notification once the current transaction has been committed.
+
+    The notification is written to the outbox in the current transaction, and the
+    send_notifications command sends it afterwards. Model instances in the context
+    are stored as dicts of their TEMPLATE_MODEL_ATTRIBUTES. Writing the same
+    notification again does nothing until the earlier one has been sent.
+    """
+    data = json.dumps(
+        [notification_type, email, language, _serializable(context or {})],
+        cls=DjangoJSONEncoder,
+        sort_keys=True,
+    )
+    OutboxNotification.objects.bulk_create(
+        [
+            OutboxNotification(
+                key=hashlib.sha256(data.encode()).hexdigest(),
+                notification_type=notification_type,
+                email=email,
+                language=language,
+                context=json.loads(data)[3],
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _serializable(value):
+    if isinstance(value, models.Model):
+        return {
+            name: _serializable(getattr(value, name))
+            for name in TEMPLATE_MODEL_ATTRIBUTES
+            if hasattr(value, name)
+        }
+    if isinstance(value, dict):
+        return {key: _serializable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_serializable(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def queue_notification(
+    email, notification_type, context=None, language=DEFAULT_LANGUAGE
+):
+    """Render a notification into the mail queue.
+
+    The templates are compiled once per process and language. Raise
+    NotificationNotSent if there's no template or it can't be rendered.
+    """
+    try:
+        template = notification_templates.get(notification_type, language)
+    except TemplateError as e:
+        raise NotificationNotSent(f"Invalid template: {e}") from e
+    if not template:
+        raise NotificationNotSent(
+            f'No notification template created for "{notification_type}" event '
+            f'in "{language}".'
+        )
+
+    try:
+        subject = template.subject.render(context or {})
+        body_html = template.body_html.render(context or {})
+        if template.body_text:
+            body_text = template.body_text.render(context or {})
+        else:
+            body_text = strip_tags(body_html)
+    except TemplateError as e:
+        raise NotificationNotSent(f"Rendering failed: {e}") from e
+
+    if not subject:
+        raise NotificationNotSent(
+            f'Rendered notification "{notification_type}" has an empty subject.'
+        )
+
+    translated_from_email = getattr(settings, "ILMOITIN_TRANSLATED_FROM_EMAIL", {})
+    from_email = translated_from_email.get(language, settings.DEFAULT_FROM_EMAIL)
+    send_mail(subject, body_text, email, from_email=from_email, body_html=body_html)
+    for admin_email in template.admin_emails:
+        send_mail(
+            template.admin_subject,
+            template.admin_text,
+            admin_email,
+            from_email=from_email,
+        )
+
+
+def send_outbox_notifications(batch_size=100):
+    """Send the next batch of notifications due in the outbox.
+
+    The notifications are locked for the batch, so concurrent workers send different
+    notifications. Each one is rendered into the mail queue and marked sent in the
+    same transaction, so it isn't queued twice. Notifications without a template or
+    failing to render are not retried, other failures are retried with an
+    exponentially growing delay until NOTIFICATION_OUTBOX_MAX_ATTEMPTS.
+    The email address and context of notifications which are no longer going to be
+    sent are cleared, so the outbox doesn't keep personal data.
+
+    Return the number of sent and failed notifications.
+    """
+    now = timezone.now()
+    sent = failed = 0
+
+    with transaction.atomic():
+        notifications = list(
+            OutboxNotification.objects.filter(next_attempt_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        for notification in notifications:
+            notification.attempts += 1
+            try:
+                with transaction.atomic():
+                    queue_notification(
+                        notification.email,
+                        notification.notification_type,
+                        notification.context,
+                        notification.language,
+                    )
+            except NotificationNotSent as e:
+                # Like django_ilmoitin, missing and invalid templates are skipped
+                logger.warning(f"Notification {notification.pk} not sent: {e}")
+                notification.last_error = str(e)
+                notification.next_attempt_at = None
+                failed += 1
+            except Exception as e:
+                logger.warning(
+                    f"Sending notification {notification.pk} failed: {e}", exc_info=True
+                )
+                notification.last_error = str(e)
+                notification.next_attempt_at = _next_attempt_at(notification, now)
+                failed += 1
+            else:
+                notification.sent_at = now
+                notification.next_attempt_at = None
+                sent += 1
+
+            if notification.next_attempt_at is None:
+                notification.email = ""
+                notification.context = {}
+
+        OutboxNotification.objects.bulk_update(
+            notifications,
+            [
+                "email",
+                "context",
+                "attempts",
+                "next_attempt_at",
+                "sent_at",
+                "last_error",
+            ],
+        )
+
+    # Send the mail queue right away unless it's sent separately
+    if sent and not getattr(settings, "ILMOITIN_QUEUE_NOTIFICATIONS", False):
+        Message.objects.retry_deferred()
+        send_all()
+
+    return sent, failed
+
+
+def _next_attempt_at(notification, now):
+    if notification.attempts >= settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+        return None
+    delay = settings.NOTIFICATION_OUTBOX_RETRY_DELAY * 2 ** (notification.attempts - 1)
+    return now + timedelta(seconds=delay)
+
+
+@receiver(post_save, sender=NotificationTemplate)
+@receiver(post_delete, sender=NotificationTemplate)
+@receiver(post_save, sender=NotificationTemplate._parler_meta.root_model)
+@receiver(post_delete, sender=NotificationTemplate._parler_meta.root_model)
+@receiver(m2m_changed, sender=NotificationTemplate.admins_to_notify.through)
+def invalidate_notification_templates(sender, **kwargs):
+    notification_templates.invalidate()
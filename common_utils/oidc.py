@@ -1,4 +1,19 @@
+import hashlib
+import logging
+import threading
+import time
+from calendar import timegm
+from datetime import datetime
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import ugettext as _
+from helusers.authz import UserAuthorization
 from helusers.oidc import ApiTokenAuthentication
+from jwkest.jwk import KEYS
+from oidc_auth.settings import api_settings as oidc_auth_settings
 from rest_framework.exceptions import AuthenticationFailed
 
 from common_utils.signals import (
@@ -6,6 +21,76 @@ from common_utils.signals import (
     token_authentication_successful,
 )
 
+logger = logging.getLogger(__name__)
+
+VALIDATED_TOKEN_CACHE_KEY = "oidc:validated_token:{token_hash}"
+
+
+class RefreshingCache:
+    """Process wide cache of values which are refreshed in the background.
+
+    Values older than `refresh_interval` seconds are reloaded in a background thread
+    while the old value is still served. Values older than `max_age` seconds are
+    reloaded before returning.
+    """
+
+    def __init__(self, refresh_interval, max_age):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._values = {}
+        self._refreshing = set()
+
+    def get(self, key, load):
+        value, loaded_at = self._values.get(key, (None, None))
+        if loaded_at is None or time.monotonic() - loaded_at > self.max_age:
+            return self._load(key, load)
+        if time.monotonic() - loaded_at > self.refresh_interval:
+            self._load_in_background(key, load)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _load(self, key, load):
+        value = load()
+        with self._lock:
+            self._values[key] = (value, time.monotonic())
+        return value
+
+    def _load_in_background(self, key, load):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._load(key, load)
+            except Exception:
+                logger.exception(f"Refreshing cached value {key} failed")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+
+oidc_cache = RefreshingCache(
+    refresh_interval=settings.OIDC_KEYS_REFRESH_INTERVAL,
+    max_age=settings.OIDC_KEYS_MAX_AGE,
+)
+
+
+def _token_cache_timeout(payload):
+    """Seconds the validated token can be cached before its claims would expire."""
+    now = timegm(datetime.utcnow().utctimetuple())
+    expires_at = min(
+        payload.get("exp", 0), payload.get("iat", 0) + oidc_auth_settings.OIDC_LEEWAY
+    )
+    return min(expires_at - now, settings.OIDC_TOKEN_CACHE_TIMEOUT)
+
 
 class GraphQLApiTokenAuthentication(ApiTokenAuthentication):
     """
@@ -16,11 +101,17 @@ class GraphQLApiTokenAuthentication(ApiTokenAuthentication):
     Authenticate function should:
     1. accept kwargs, or django's auth middleware will not call it
     2. return only the user object, or django's auth middleware will fail
+
+    The OIDC configuration and the issuer's keys are cached in the process and
+    refreshed in the background. Validated tokens are cached together with the
+    resolved user's pk until the token would expire, so that repeated requests with
+    the same token skip the signature verification and the user resolution. The
+    user is still loaded on every request.
     """
 
     def authenticate(self, request, **kwargs):
         try:
-            user_auth_tuple = super().authenticate(request)
+            user_auth_tuple = self._authenticate(request)
         except AuthenticationFailed as e:
             token_authentication_failed.send(
                 sender=__name__, error=e.detail, request=request
@@ -33,3 +124,61 @@ class GraphQLApiTokenAuthentication(ApiTokenAuthentication):
             sender=__name__, user=user, request=request
         )
         return user
+
+    def _authenticate(self, request):
+        jwt_value = self.get_jwt_value(request)
+        if jwt_value is None:
+            return None
+
+        cache_key = VALIDATED_TOKEN_CACHE_KEY.format(
+            token_hash=hashlib.sha256(jwt_value).hexdigest()
+        )
+        user = None
+        cached = cache.get(cache_key)
+        if cached:
+            user_pk, payload = cached
+            # Cheap to check and keeps e.g. the expiration check exact
+            self.validate_claims(payload)
+            # Loaded on every request, so changes like deactivating take effect
+            user = get_user_model().objects.filter(pk=user_pk).first()
+        if user is None:
+            payload = self.decode_jwt(jwt_value)
+            self.validate_claims(payload)
+            user = self.settings.USER_RESOLVER(request, payload)
+            timeout = _token_cache_timeout(payload)
+            if timeout > 0:
+                cache.set(cache_key, (user.pk, payload), timeout)
+
+        auth = UserAuthorization(user, payload, self.settings)
+
+        if self.settings.REQUIRE_API_SCOPE_FOR_AUTHENTICATION:
+            api_scope = self.settings.API_SCOPE_PREFIX
+            if not auth.has_api_scope_with_prefix(api_scope):
+                raise AuthenticationFailed(
+                    _('Not authorized for API scope "{api_scope}"').format(
+                        api_scope=api_scope
+                    )
+                )
+
+        return user, auth
+
+    def get_oidc_config(self):
+        return oidc_cache.get(("config", self.settings.ISSUER), self._load_oidc_config)
+
+    def jwks(self):
+        return oidc_cache.get(("jwks", self.settings.ISSUER), self._load_jwks)
+
+    def _load_oidc_config(self):
+        url = self.settings.ISSUER + "/.well-known/openid-configuration"
+        response = requests.get(url, timeout=settings.OIDC_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def _load_jwks(self):
+        response = requests.get(
+            self.oidc_config["jwks_uri"], timeout=settings.OIDC_REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        keys = KEYS()
+        keys.load_jwks(response.text)
+        return keys
@@ -8,6 +8,7 @@ from django.utils.dateparse import parse_datetime
 from requests.auth import AuthBase
 
 from common_utils.exceptions import ProfileAPIError
+from common_utils.tracing import trace_profile_api
 
 logger = logging.getLogger(__name__)
 
@@ -187,13 +188,14 @@ class ProfileAPI:
         payload = {"query": query}
         if variables:
             payload["variables"] = variables
-        response = requests.post(
-            settings.HELSINKI_PROFILE_API_URL,
-            json=payload,
-            timeout=self.timeout,
-            auth=BearerAuth(api_token) if api_token else None,
-            verify=settings.PROFILE_API_VERIFY,
-        )
+        with trace_profile_api():
+            response = requests.post(
+                settings.HELSINKI_PROFILE_API_URL,
+                json=payload,
+                timeout=self.timeout,
+                auth=BearerAuth(api_token) if api_token else None,
+                verify=settings.PROFILE_API_VERIFY,
+            )
         response.raise_for_status()
 
         return response.json()
@@ -1,9 +1,20 @@
 import os
+from io import StringIO
 
+import pytest
+from django.core import mail
 from django.core.management import call_command
 from django.test import override_settings
 from django_ilmoitin.models import NotificationTemplate
+from mailer.models import (
+    Message,
+    MessageLog,
+    PRIORITY_DEFERRED,
+    RESULT_FAILURE,
+    RESULT_SUCCESS,
+)
 
+from common_utils import mail_queue
 from common_utils.utils import EMAIL_GENERATED_PATH
 
 
@@ -32,3 +43,66 @@ def test_command_generate_notifications_from_templates_generates_correct_looking
         a_template_file = generated_template.read()
 
     snapshot.assert_match(a_template_file)
+
+
+@pytest.fixture
+def queued_mail(settings):
+    settings.EMAIL_BACKEND = "mailer.backend.DbBackend"
+    settings.MAILER_EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    for i in range(3):
+        mail.send_mail(f"Subject {i}", "Body", None, [f"guardian{i}@example.com"])
+
+
+def test_command_send_queued_mail_sends_the_mail_queue_in_batches(queued_mail, mocker):
+    get_connection = mocker.spy(mail_queue, "get_connection")
+    out = StringIO()
+
+    call_command("send_queued_mail", "--batch-size", "2", stdout=out)
+
+    # One connection per batch
+    assert get_connection.call_count == 2
+
+    assert sorted(email.subject for email in mail.outbox) == [
+        "Subject 0",
+        "Subject 1",
+        "Subject 2",
+    ]
+    assert Message.objects.count() == 0
+    assert MessageLog.objects.count() == 3
+    assert "Sent 3 messages" in out.getvalue()
+    assert "Queue: 0 waiting, 0 deferred" in out.getvalue()
+
+
+def test_command_send_queued_mail_defers_failed_messages(queued_mail, mocker):
+    mocker.patch(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        side_effect=ConnectionRefusedError("Connection refused"),
+    )
+    out = StringIO()
+
+    call_command("send_queued_mail", stdout=out)
+
+    assert Message.objects.filter(priority=PRIORITY_DEFERRED).count() == 3
+    assert MessageLog.objects.filter(result=RESULT_FAILURE).count() == 3
+    assert "3 failed. Queue: 0 waiting, 3 deferred" in out.getvalue()
+
+
+def test_command_send_queued_mail_retries_deferred_messages(queued_mail):
+    Message.objects.update(priority=PRIORITY_DEFERRED)
+    out = StringIO()
+
+    call_command("send_queued_mail", "--retry-deferred-interval", "60", stdout=out)
+
+    assert len(mail.outbox) == 3
+    assert Message.objects.count() == 0
+    assert "Retrying 3 deferred messages" in out.getvalue()
+
+
+def test_command_send_queued_mail_with_workers(transactional_db, queued_mail):
+    out = StringIO()
+
+    call_command("send_queued_mail", "--batch-size", "1", "--workers", "2", stdout=out)
+
+    assert Message.objects.count() == 0
+    assert MessageLog.objects.filter(result=RESULT_SUCCESS).count() == 3
+    assert "Sent 3 messages" in out.getvalue()
@@ -0,0 +1,55 @@
+from common_utils.consts import PERMISSION_DENIED_ERROR
+from youths.tests.factories import YouthProfileFactory
+
+MY_YOUTH_PROFILE_QUERY = "query { myYouthProfile { membershipNumber } }"
+YOUTH_PROFILES_QUERY = "query { youthProfiles { totalCount } }"
+
+
+def post_graphql(client, data):
+    return client.post("/graphql/", data, content_type="application/json")
+
+
+def test_single_operation_is_still_supported(client, user):
+    youth_profile = YouthProfileFactory(user=user)
+    client.force_login(user)
+
+    response = post_graphql(client, {"query": MY_YOUTH_PROFILE_QUERY})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "data": {
+            "myYouthProfile": {"membershipNumber": youth_profile.membership_number}
+        }
+    }
+
+
+def test_batched_operations_return_per_operation_results(client, user):
+    youth_profile = YouthProfileFactory(user=user)
+    client.force_login(user)
+
+    response = post_graphql(
+        client,
+        [
+            {"id": 1, "query": MY_YOUTH_PROFILE_QUERY},
+            {"id": 2, "query": YOUTH_PROFILES_QUERY},
+        ],
+    )
+
+    assert response.status_code == 200
+    first, second = response.json()
+    assert first["id"] == 1
+    assert first["data"] == {
+        "myYouthProfile": {"membershipNumber": youth_profile.membership_number}
+    }
+    assert "errors" not in first
+    assert second["id"] == 2
+    assert second["data"] == {"youthProfiles": None}
+    assert second["errors"][0]["extensions"]["code"] == PERMISSION_DENIED_ERROR
+
+
+def test_too_large_batch_is_rejected(client, settings):
+    settings.GRAPHQL_MAX_BATCH_SIZE = 2
+
+    response = post_graphql(client, [{"query": MY_YOUTH_PROFILE_QUERY}] * 3)
+
+    assert response.status_code == 400
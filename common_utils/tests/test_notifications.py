@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+from django_ilmoitin.models import NotificationTemplate
+
+from common_utils.models import OutboxNotification
+from common_utils.notifications import (
+    NotificationNotSent,
+    queue_notification,
+    send_notification,
+)
+from youths.enums import NotificationType
+from youths.tests.factories import YouthProfileFactory
+
+NOTIFICATION_TYPE = NotificationType.YOUTH_PROFILE_CONFIRMATION_NEEDED.value
+CONTEXT = {
+    "youth_profile": {
+        "approver_first_name": "Sam",
+        "approval_token": "approval_token",
+        "profile_access_token": "profile_access_token",
+    },
+    "youth_name": "Test Youth",
+    "youth_membership_ui_base_url": "https://jassari-ui/",
+}
+
+
+@pytest.fixture(autouse=True)
+def notification_templates(settings):
+    settings.ILMOITIN_QUEUE_NOTIFICATIONS = True
+    call_command("generate_notifications_from_templates")
+
+
+def test_queue_notification_compiles_template_once(django_assert_num_queries):
+    queue_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+
+    with django_assert_num_queries(0):
+        queue_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+
+    assert len(mail.outbox) == 2
+    assert mail.outbox[1].subject.startswith("Test Youth")
+
+
+def test_queue_notification_uses_edited_template():
+    queue_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+    template = NotificationTemplate.objects.get(type=NOTIFICATION_TYPE)
+    template.set_current_language("en")
+    template.subject = "Changed for {{ youth_name }}"
+    template.save()
+
+    queue_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+
+    assert mail.outbox[-1].subject == "Changed for Test Youth"
+
+
+def test_queue_notification_without_template_raises():
+    NotificationTemplate.objects.all().delete()
+
+    with pytest.raises(NotificationNotSent):
+        queue_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+
+
+def test_send_notification_is_sent_from_the_outbox():
+    send_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+    send_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+
+    assert len(mail.outbox) == 0
+    notification = OutboxNotification.objects.get()
+    assert notification.context == CONTEXT
+
+    call_command("send_notifications")
+    call_command("send_notifications")
+
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == ["approver@example.com"]
+    assert mail.outbox[0].subject.startswith("Test Youth")
+    notification.refresh_from_db()
+    assert notification.sent_at
+    assert notification.next_attempt_at is None
+    assert notification.email == ""
+    assert notification.context == {}
+
+
+def test_send_notification_is_sent_again_after_delivery():
+    send_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+    call_command("send_notifications")
+
+    send_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+    call_command("send_notifications")
+
+    assert len(mail.outbox) == 2
+    assert OutboxNotification.objects.filter(sent_at__isnull=False).count() == 2
+
+
+def test_send_notification_stores_only_template_attributes_of_model_instances():
+    youth_profile = YouthProfileFactory()
+    send_notification(
+        "approver@example.com",
+        NOTIFICATION_TYPE,
+        {"youth_profile": youth_profile, "youth_name": "Test Youth"},
+        "en",
+    )
+
+    assert OutboxNotification.objects.get().context == {
+        "youth_profile": {
+            "approver_first_name": youth_profile.approver_first_name,
+            "approval_token": youth_profile.approval_token,
+            "profile_access_token": youth_profile.profile_access_token,
+        },
+        "youth_name": "Test Youth",
+    }
+
+
+def test_notifications_without_template_are_not_retried():
+    send_notification("approver@example.com", "unknown_type", CONTEXT, "en")
+
+    call_command("send_notifications")
+
+    notification = OutboxNotification.objects.get()
+    assert notification.attempts == 1
+    assert "unknown_type" in notification.last_error
+    assert notification.next_attempt_at is None
+    assert notification.sent_at is None
+    assert notification.context == {}
+
+
+def test_failed_notifications_are_retried_later(settings, mocker):
+    settings.NOTIFICATION_OUTBOX_RETRY_DELAY = 60
+    settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS = 2
+    mocker.patch(
+        "common_utils.notifications.send_mail",
+        side_effect=ConnectionRefusedError("Connection refused"),
+    )
+    send_notification("approver@example.com", NOTIFICATION_TYPE, CONTEXT, "en")
+    notification = OutboxNotification.objects.get()
+
+    call_command("send_notifications")
+
+    notification.refresh_from_db()
+    assert notification.attempts == 1
+    assert notification.last_error == "Connection refused"
+    assert notification.next_attempt_at > timezone.now() + timedelta(seconds=50)
+    assert notification.context == CONTEXT
+
+    notification.next_attempt_at = timezone.now()
+    notification.save()
+    call_command("send_notifications")
+
+    notification.refresh_from_db()
+    assert notification.attempts == 2
+    assert notification.next_attempt_at is None
+    assert notification.sent_at is None
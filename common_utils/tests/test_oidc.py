@@ -0,0 +1,70 @@
+import pytest
+from rest_framework.exceptions import AuthenticationFailed
+
+from common_utils.oidc import GraphQLApiTokenAuthentication
+from youths.tests.test_gdpr_api import get_api_token_for_user_with_scopes
+
+
+@pytest.fixture(autouse=True)
+def setup_token_auth_url(settings):
+    settings.OIDC_API_TOKEN_AUTH["ISSUER"] = "https://test_issuer"
+
+
+@pytest.fixture
+def token_request(rf, user, requests_mock):
+    auth_header = get_api_token_for_user_with_scopes(user, [], requests_mock)
+    return rf.post("/graphql/", HTTP_AUTHORIZATION=auth_header)
+
+
+def test_token_authentication_returns_user(token_request, user):
+    authenticated_user = GraphQLApiTokenAuthentication().authenticate(token_request)
+
+    assert authenticated_user == user
+
+
+def test_repeated_token_authentication_uses_cached_token(
+    token_request, user, requests_mock, mocker, django_assert_num_queries
+):
+    GraphQLApiTokenAuthentication().authenticate(token_request)
+    call_count = requests_mock.call_count
+    decode_jwt = mocker.spy(GraphQLApiTokenAuthentication, "decode_jwt")
+
+    with django_assert_num_queries(1):
+        authenticated_user = GraphQLApiTokenAuthentication().authenticate(token_request)
+
+    assert authenticated_user == user
+    assert decode_jwt.call_count == 0
+    assert requests_mock.call_count == call_count
+
+
+def test_cached_token_authentication_returns_current_user(token_request, user):
+    GraphQLApiTokenAuthentication().authenticate(token_request)
+    user.is_active = False
+    user.is_staff = False
+    user.save()
+
+    authenticated_user = GraphQLApiTokenAuthentication().authenticate(token_request)
+
+    assert authenticated_user == user
+    assert not authenticated_user.is_active
+    assert not authenticated_user.is_staff
+
+
+def test_oidc_configuration_and_keys_are_fetched_once(
+    rf, user, superuser, requests_mock
+):
+    for token_user in (user, superuser):
+        auth_header = get_api_token_for_user_with_scopes(token_user, [], requests_mock)
+        request = rf.post("/graphql/", HTTP_AUTHORIZATION=auth_header)
+        assert GraphQLApiTokenAuthentication().authenticate(request) == token_user
+
+    assert requests_mock.call_count == 2
+
+
+def test_invalid_token_is_not_cached(rf, token_request):
+    invalid_header = token_request.META["HTTP_AUTHORIZATION"][:-4] + "abcd"
+    request = rf.post("/graphql/", HTTP_AUTHORIZATION=invalid_header)
+
+    for _ in range(2):
+        with pytest.raises(AuthenticationFailed):
+            GraphQLApiTokenAuthentication().authenticate(request)
@@ -0,0 +1,78 @@
+import json
+
+from common_utils.tracing import TRACING_HEADER
+from youths.tests.factories import YouthProfileFactory
+
+YOUTH_PROFILES_QUERY = """
+    query YouthProfiles {
+        youthProfiles {
+            edges {
+                node {
+                    membershipNumber
+                }
+            }
+        }
+    }
+"""
+
+
+def post_graphql(client, query, **extra):
+    return client.post(
+        "/graphql/",
+        {"query": query, "operationName": "YouthProfiles"},
+        content_type="application/json",
+        **extra,
+    )
+
+
+def trace_header():
+    return {f"HTTP_{TRACING_HEADER.upper().replace('-', '_')}": "1"}
+
+
+def test_tracing_is_returned_to_staff_users(client, staff_user):
+    YouthProfileFactory.create_batch(2)
+    client.force_login(staff_user)
+
+    response = post_graphql(client, YOUTH_PROFILES_QUERY, **trace_header())
+
+    assert response.status_code == 200
+    tracing = response.json()["extensions"]["tracing"]
+    assert tracing["duration_ms"] >= 0
+    assert tracing["db_queries"] > 0
+    assert tracing["profile_api"] == {"calls": 0, "duration_ms": 0.0}
+    resolver = next(r for r in tracing["resolvers"] if r["path"] == ["youthProfiles"])
+    assert resolver["parent_type"] == "Query"
+    assert resolver["field_name"] == "youthProfiles"
+    assert resolver["db_queries"] > 0
+
+
+def test_tracing_is_not_returned_to_normal_users(client, user):
+    client.force_login(user)
+
+    response = post_graphql(client, YOUTH_PROFILES_QUERY, **trace_header())
+
+    assert "extensions" not in response.json()
+
+
+def test_tracing_is_not_returned_without_header(client, staff_user):
+    client.force_login(staff_user)
+
+    response = post_graphql(client, YOUTH_PROFILES_QUERY)
+
+    assert "extensions" not in response.json()
+
+
+def test_slow_operations_are_logged(client, staff_user, settings, caplog):
+    settings.GRAPHQL_TRACING_SLOW_THRESHOLD_MS = 0.001
+    YouthProfileFactory()
+    client.force_login(staff_user)
+
+    response = post_graphql(client, YOUTH_PROFILES_QUERY)
+
+    assert "extensions" not in response.json()
+    records = [r for r in caplog.records if r.name == "common_utils.tracing"]
+    assert len(records) == 1
+    logged = json.loads(records[0].getMessage())["slow_graphql_operation"]
+    assert logged["operation_name"] == "YouthProfiles"
+    assert logged["db_queries"] > 0
+    assert logged["resolvers"]
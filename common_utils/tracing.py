@@ -0,0 +1,156 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from crum import get_current_request
+from django.conf import settings
+from django.db import connection
+from promise import Promise
+
+logger = logging.getLogger(__name__)
+
+TRACING_HEADER = "X-GraphQL-Trace"
+
+# Number of the slowest resolvers included in the slow operation log
+SLOW_OPERATION_LOGGED_RESOLVERS = 10
+
+
+def _milliseconds(seconds):
+    return round(seconds * 1000, 3)
+
+
+class GraphQLTracer:
+    """Collects timing information of a single GraphQL operation.
+
+    The tracer is also a database execute wrapper, counting the executed queries.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.duration = None
+        self.resolvers = []
+        self.db_queries = 0
+        self.profile_api_calls = 0
+        self.profile_api_duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.db_queries += 1
+        return execute(sql, params, many, context)
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start
+
+    def add_resolver(self, info, start, db_queries):
+        end = time.perf_counter()
+        self.resolvers.append(
+            {
+                "path": list(info.path),
+                "parent_type": str(info.parent_type),
+                "field_name": info.field_name,
+                "start_offset_ms": _milliseconds(start - self.start),
+                "duration_ms": _milliseconds(end - start),
+                "db_queries": self.db_queries - db_queries,
+            }
+        )
+
+    def add_profile_api_call(self, duration):
+        self.profile_api_calls += 1
+        self.profile_api_duration += duration
+
+    def as_dict(self, resolvers=None):
+        return {
+            "duration_ms": _milliseconds(self.duration),
+            "db_queries": self.db_queries,
+            "profile_api": {
+                "calls": self.profile_api_calls,
+                "duration_ms": _milliseconds(self.profile_api_duration),
+            },
+            "resolvers": self.resolvers if resolvers is None else resolvers,
+        }
+
+    def slowest_resolvers(self, count):
+        return sorted(self.resolvers, key=lambda r: r["duration_ms"], reverse=True)[
+            :count
+        ]
+
+
+def get_current_tracer():
+    request = get_current_request()
+    return getattr(request, "graphql_tracer", None)
+
+
+def _log_slow_operation(tracer, operation_name):
+    threshold = settings.GRAPHQL_TRACING_SLOW_THRESHOLD_MS
+    if not threshold or _milliseconds(tracer.duration) < threshold:
+        return
+
+    slowest_resolvers = tracer.slowest_resolvers(SLOW_OPERATION_LOGGED_RESOLVERS)
+    logger.warning(
+        json.dumps(
+            {
+                "slow_graphql_operation": {
+                    "operation_name": operation_name,
+                    **tracer.as_dict(resolvers=slowest_resolvers),
+                }
+            }
+        )
+    )
+
+
+@contextmanager
+def trace_operation(request, operation_name):
+    """Trace a GraphQL operation executed within the context.
+
+    Tracing is enabled if the tracing header is set or slow operation logging is on.
+    Yields the tracer, or None if tracing is not enabled.
+    """
+    if not (
+        request.headers.get(TRACING_HEADER)
+        or settings.GRAPHQL_TRACING_SLOW_THRESHOLD_MS
+    ):
+        yield None
+        return
+
+    tracer = GraphQLTracer()
+    request.graphql_tracer = tracer
+    try:
+        with connection.execute_wrapper(tracer):
+            yield tracer
+    finally:
+        request.graphql_tracer = None
+        tracer.finish()
+    _log_slow_operation(tracer, operation_name)
+
+
+@contextmanager
+def trace_profile_api():
+    """Measure the time spent calling the Helsinki profile API."""
+    tracer = get_current_tracer()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if tracer:
+            tracer.add_profile_api_call(time.perf_counter() - start)
+
+
+class TracingMiddleware:
+    """Graphene middleware recording the duration and DB query count of each resolver."""
+
+    def resolve(self, next, root, info, **kwargs):
+        tracer = getattr(info.context, "graphql_tracer", None)
+        if tracer is None:
+            return next(root, info, **kwargs)
+
+        start = time.perf_counter()
+        db_queries = tracer.db_queries
+        result = next(root, info, **kwargs)
+
+        def on_resolve(value):
+            tracer.add_resolver(info, start, db_queries)
+            return value
+
+        if Promise.is_thenable(result):
+            return Promise.resolve(result).then(on_resolve)
+        return on_resolve(result)
@@ -1,6 +1,9 @@
 import sentry_sdk
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
+from django.http import HttpResponseBadRequest
 from graphene_django.views import GraphQLView as BaseGraphQLView
+from graphene_django.views import HttpError
 from graphql_jwt.exceptions import PermissionDenied as JwtPermissionDenied
 
 from common_utils.consts import (
@@ -25,6 +28,7 @@ from common_utils.exceptions import (
     ProfileMustHaveOnePrimaryEmail,
     TokenExpiredError,
 )
+from common_utils.tracing import trace_operation, TRACING_HEADER
 from youths.consts import (
     APPROVER_EMAIL_CANNOT_BE_EMPTY_FOR_MINORS_ERROR,
     CANNOT_CREATE_YOUTH_PROFILE_IF_UNDER_13_YEARS_OLD_ERROR,
@@ -37,6 +41,7 @@ from youths.exceptions import (
     CannotRenewYouthProfileError,
     CannotSetPhotoUsagePermissionIfUnder15YearsError,
 )
+from youths.utils import user_is_admin
 
 error_codes_shared = {
     Exception: GENERAL_ERROR,
@@ -74,9 +79,41 @@ error_codes = {**error_codes_shared, **error_codes_profile, **error_codes_youth_
 
 
 class SentryGraphQLView(BaseGraphQLView):
-    def execute_graphql_request(self, request, data, query, *args, **kwargs):
+    def parse_body(self, request):
+        """Accept both single operations and a JSON list of batched operations.
+
+        All operations of a batch are executed within the same request, so
+        authentication and user resolution are done only once.
+        """
+        self.batch = (
+            request.content_type == "application/json"
+            and request.body.lstrip()[:1] == b"["
+        )
+        data = super().parse_body(request)
+        if self.batch and len(data) > settings.GRAPHQL_MAX_BATCH_SIZE:
+            raise HttpError(
+                HttpResponseBadRequest(
+                    "Batch requests may contain at most "
+                    f"{settings.GRAPHQL_MAX_BATCH_SIZE} operations."
+                )
+            )
+        return data
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, *args, **kwargs
+    ):
         """Extract any exceptions and send some of them to Sentry"""
-        result = super().execute_graphql_request(request, data, query, *args, **kwargs)
+        with trace_operation(request, operation_name) as tracer:
+            result = super().execute_graphql_request(
+                request, data, query, variables, operation_name, *args, **kwargs
+            )
+        if (
+            tracer
+            and request.headers.get(TRACING_HEADER)
+            and user_is_admin(request.user)
+        ):
+            self._extensions = {"tracing": tracer.as_dict()}
+
         # If 'invalid' is set, it's a bad request
         if result and result.errors and not result.invalid:
             errors = [
@@ -93,6 +130,13 @@ class SentryGraphQLView(BaseGraphQLView):
                 self._capture_sentry_exceptions(result.errors, query)
         return result
 
+    def json_encode(self, request, d, pretty=False):
+        extensions = getattr(self, "_extensions", None)
+        if extensions and isinstance(d, dict):
+            d["extensions"] = extensions
+            self._extensions = None
+        return super().json_encode(request, d, pretty=pretty)
+
     def _capture_sentry_exceptions(self, errors, query):
         with sentry_sdk.configure_scope() as scope:
             scope.set_extra("graphql_query", query)
@@ -28,6 +28,8 @@ fi
 if [[ ! -z "$@" ]]; then
     "$@"
 elif [[ "$DEV_SERVER" = "1" ]]; then
+    # Send the notifications written to the outbox
+    python ./manage.py send_notifications --loop &
     python -Wd ./manage.py runserver 0.0.0.0:8000
 else
     uwsgi --ini .prod/uwsgi.ini
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.18 on 2026-10-19 11:20
+
+from django.db import migrations
+
+# Expressions match the SQL Django generates for icontains lookups
+SEARCH_FIELDS = ("first_name", "last_name", "email")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        # Shared by both apps' indexes, so it's not dropped when migrating backwards
+        migrations.RunSQL(
+            sql="CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            reverse_sql=migrations.RunSQL.noop,
+        )
+    ] + [
+        migrations.RunSQL(
+            sql=(
+                f"CREATE INDEX users_{field}_trgm_idx ON users_user "
+                f"USING gin (UPPER({field}::text) gin_trgm_ops);"
+            ),
+            reverse_sql=f"DROP INDEX users_{field}_trgm_idx;",
+        )
+        for field in SEARCH_FIELDS
+    ]
@@ -47,6 +47,7 @@ env = environ.Env(
     MAIL_MAILGUN_DOMAIN=(str, ""),
     MAIL_MAILGUN_API=(str, ""),
     NOTIFICATIONS_ENABLED=(bool, False),
+    ILMOITIN_QUEUE_NOTIFICATIONS=(bool, False),
     EMAIL_TEMPLATE_IMAGE_SOURCE=(str, ""),
     EMAIL_TEMPLATE_YOUTH_MEMBERSHIP_UI_BASE_URL=(str, ""),
     VERSION=(str, None),
@@ -65,6 +66,7 @@ env = environ.Env(
     USE_X_FORWARDED_HOST=(bool, None),
     USE_X_FORWARDED_FOR=(bool, False),
     CSRF_TRUSTED_ORIGINS=(list, []),
+    GRAPHQL_TRACING_SLOW_THRESHOLD_MS=(int, 0),
 )
 if os.path.exists(env_file):
     env.read_env(env_file)
@@ -249,6 +251,15 @@ OIDC_API_TOKEN_AUTH = {
 
 OIDC_AUTH = {"OIDC_LEEWAY": 60 * 60}
 
+# The OIDC configuration and the issuer's keys are refreshed in the background once
+# they are older than the refresh interval, and before use once older than max age.
+OIDC_KEYS_REFRESH_INTERVAL = 10 * 60
+OIDC_KEYS_MAX_AGE = 24 * 60 * 60
+OIDC_REQUEST_TIMEOUT = 5
+
+# Upper limit in seconds for caching a validated API token and its user
+OIDC_TOKEN_CACHE_TIMEOUT = 5 * 60
+
 AUTHENTICATION_BACKENDS = [
     "helusers.tunnistamo_oidc.TunnistamoOIDCAuth",
     "django.contrib.auth.backends.ModelBackend",
@@ -285,20 +296,45 @@ if env("MAIL_MAILGUN_KEY"):
     }
 EMAIL_BACKEND = "mailer.backend.DbBackend"
 MAILER_EMAIL_BACKEND = env("MAILER_EMAIL_BACKEND")
+# Leave the mail queue to be sent by the send_queued_mail command
+ILMOITIN_QUEUE_NOTIFICATIONS = env("ILMOITIN_QUEUE_NOTIFICATIONS")
 EMAIL_TEMPLATE_IMAGE_SOURCE = env("EMAIL_TEMPLATE_IMAGE_SOURCE")
 EMAIL_TEMPLATE_YOUTH_MEMBERSHIP_UI_BASE_URL = env(
     "EMAIL_TEMPLATE_YOUTH_MEMBERSHIP_UI_BASE_URL"
 )
 
+# Notifications which couldn't be sent are retried after this many seconds, and the
+# delay is doubled after every failed attempt
+NOTIFICATION_OUTBOX_RETRY_DELAY = 60
+
+# Notifications are no longer retried after this many failed attempts
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = 10
+
 # Graphene
 
 GRAPHENE = {
     "SCHEMA": "youth_membership.schema.schema",
-    "MIDDLEWARE": ["graphql_jwt.middleware.JSONWebTokenMiddleware"],
+    "MIDDLEWARE": [
+        "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        "common_utils.tracing.TracingMiddleware",
+    ],
 }
 
 GRAPHQL_JWT = {"JWT_AUTH_HEADER_PREFIX": "Bearer"}
 
+# GraphQL operations taking longer than this are logged with their slowest resolvers.
+# 0 disables the logging.
+GRAPHQL_TRACING_SLOW_THRESHOLD_MS = env("GRAPHQL_TRACING_SLOW_THRESHOLD_MS")
+
+# Maximum number of operations accepted in a single batched GraphQL request
+GRAPHQL_MAX_BATCH_SIZE = 20
+
+# Connection `totalCount` values are cached for this many seconds
+GRAPHQL_TOTAL_COUNT_CACHE_TIMEOUT = 60
+
+# Tables estimated to have fewer rows than this are counted exactly for `totalCount`
+GRAPHQL_TOTAL_COUNT_EXACT_THRESHOLD = 10000
+
 if "SECRET_KEY" not in locals():
     secret_file = os.path.join(BASE_DIR, ".django_secret")
     try:
@@ -334,6 +370,10 @@ if "SECRET_KEY" not in locals():
 # For example, PK 123, length 6 --> 000123.
 YOUTH_MEMBERSHIP_NUMBER_LENGTH = 6
 
+# How many membership numbers each process reserves at once. Unused numbers of a
+# block are left as gaps when the process exits.
+YOUTH_MEMBERSHIP_NUMBER_BLOCK_SIZE = 20
+
 # Date (day, month) for when the memberships are set to expire
 YOUTH_MEMBERSHIP_SEASON_END_DATE = 31, 8
 
@@ -342,6 +382,17 @@ YOUTH_MEMBERSHIP_FULL_SEASON_START_MONTH = 5
 
 YOUTH_MEMBERSHIP_STAFF_GROUP = "youth_admin"
 
+# How long a user's staff group membership is cached, in seconds. The cache is
+# invalidated when the user's groups change.
+YOUTH_MEMBERSHIP_STAFF_GROUP_CACHE_TIMEOUT = 60
+
+# How long a user's own youth profile is kept in the cache, in seconds.
+# The cached profile is invalidated whenever the profile or its contact persons change.
+MY_YOUTH_PROFILE_CACHE_TIMEOUT = 300
+
+# Number of youth profiles read from the database at a time when streaming an export
+YOUTH_PROFILE_EXPORT_CHUNK_SIZE = 2000
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -363,6 +414,10 @@ LOGGING = {
             "handlers": ["console"],
             "level": "INFO",
         },
+        "common_utils.tracing": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
     },
 }
 
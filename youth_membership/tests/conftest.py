@@ -2,8 +2,11 @@ import factory.random
 import pytest
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from graphene.test import Client as GraphQLClient
 
+from common_utils.notifications import notification_templates
+from common_utils.oidc import oidc_cache
 from common_utils.views import SentryGraphQLView
 from users.factories import GroupFactory, SuperuserFactory, UserFactory
 from youth_membership.schema import schema
@@ -19,6 +22,13 @@ def setup_helsinki_profile_settings(settings):
     settings.HELSINKI_PROFILE_API_URL = "https://localhost"
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    oidc_cache.clear()
+    notification_templates.clear()
+
+
 @pytest.fixture(autouse=True)
 def set_random_seed():
     factory.random.reseed_random(666)
@@ -6,6 +6,7 @@ from django.urls import include, path
 from django.views.decorators.csrf import csrf_exempt
 
 from common_utils.views import SentryGraphQLView
+from youths.views import YouthProfileExportView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -20,6 +21,11 @@ urlpatterns = [
         ),
     ),
     path("gdpr-api/", include("helsinki_gdpr.urls")),
+    path(
+        "export/youth-profiles/",
+        YouthProfileExportView.as_view(),
+        name="youth_profile_export",
+    ),
 ]
 
 
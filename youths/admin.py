@@ -60,3 +60,27 @@ class YouthProfileAdmin(admin.ModelAdmin):
             },
         ),
     )
+
+    # Fields covered by YouthProfileQuerySet.search, which uses trigram indexes
+    indexed_search_fields = (
+        "membership_number",
+        "user__first_name",
+        "user__last_name",
+        "user__email",
+        "school_name",
+        "school_class",
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Same trigram indexed search as the API instead of ORing search_fields,
+        # combined with the default search when there are other search fields
+        indexed = queryset
+        for term in search_term.split():
+            indexed = indexed.search(term)
+        if set(self.get_search_fields(request)) <= set(self.indexed_search_fields):
+            return indexed, False
+
+        results, use_distinct = super().get_search_results(
+            request, queryset, search_term
+        )
+        return results | indexed, use_distinct
@@ -0,0 +1,143 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from common_utils.audit_logging import log
+
+from .models import YouthProfile
+
+MY_YOUTH_PROFILE_CACHE_KEY = "youths:my_youth_profile:{user_id}"
+MY_YOUTH_PROFILE_GENERATION_KEY = "youths:my_youth_profile:{user_id}:generation"
+MY_YOUTH_PROFILE_STATS_KEY = "youths:my_youth_profile:stats:{name}"
+
+# How long to wait for another worker to populate the cache before reading the DB
+LOCK_WAIT_TIMEOUT = 1
+LOCK_WAIT_INTERVAL = 0.05
+
+
+def _cache_key(user_id):
+    return MY_YOUTH_PROFILE_CACHE_KEY.format(user_id=user_id)
+
+
+def _generation_key(user_id):
+    return MY_YOUTH_PROFILE_GENERATION_KEY.format(user_id=user_id)
+
+
+def _increment(name):
+    key = MY_YOUTH_PROFILE_STATS_KEY.format(name=name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def _load_my_youth_profile(user):
+    return (
+        YouthProfile.objects.filter(user=user)
+        .prefetch_related("additional_contact_persons")
+        .first()
+    )
+
+
+def _current(cached, generation):
+    """Return the cached value if it was loaded in the given generation."""
+    if cached is not None and cached[0] == generation:
+        return cached
+    return None
+
+
+def _wait_for_cached(key, generation):
+    deadline = time.monotonic() + LOCK_WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_WAIT_INTERVAL)
+        cached = _current(cache.get(key), generation)
+        if cached is not None:
+            return cached
+    return None
+
+
+def get_my_youth_profile(user):
+    """Return the user's youth profile with its additional contact persons.
+
+    The profile is read through the shared cache. Only one worker at a time loads
+    a missing value from the database, others wait for it to appear in the cache.
+    Cached profiles are tagged with the user's cache generation read before loading
+    them, so a profile loaded before an invalidation is never served after it.
+    Cache hits are audit logged the same way as reads from the database.
+    """
+    key = _cache_key(user.pk)
+    generation_key = _generation_key(user.pk)
+    values = cache.get_many([key, generation_key])
+    generation = values.get(generation_key)
+    cached = _current(values.get(key), generation)
+    if cached is None:
+        lock_key = f"{key}:lock"
+        if cache.add(lock_key, 1, timeout=LOCK_WAIT_TIMEOUT):
+            try:
+                youth_profile = _load_my_youth_profile(user)
+                cache.set(
+                    key,
+                    (generation, youth_profile),
+                    settings.MY_YOUTH_PROFILE_CACHE_TIMEOUT,
+                )
+            finally:
+                cache.delete(lock_key)
+            _increment("misses")
+            return youth_profile
+
+        cached = _wait_for_cached(key, generation)
+        if cached is None:
+            _increment("misses")
+            return _load_my_youth_profile(user)
+
+    _increment("hits")
+    youth_profile = cached[1]
+    if youth_profile:
+        # Avoid a query for the user when audit logging the read
+        youth_profile.user = user
+        log("READ", youth_profile)
+    return youth_profile
+
+
+def _invalidate(user_ids):
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+    # Profiles being loaded by concurrent readers won't match the new generation
+    generation = uuid.uuid4().hex
+    cache.set_many(
+        {_generation_key(user_id): generation for user_id in user_ids}, timeout=None
+    )
+
+
+def invalidate_my_youth_profile(user_id):
+    """Remove the user's cached youth profile, now and after the transaction commits.
+
+    The second invalidation drops profiles cached by readers which loaded them
+    before the change was committed.
+    """
+    if user_id is None:
+        return
+    _invalidate([user_id])
+    transaction.on_commit(lambda: _invalidate([user_id]))
+
+
+def invalidate_my_youth_profiles(user_ids):
+    """Remove the cached youth profiles of many users, e.g. after a bulk update."""
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if not user_ids:
+        return
+    _invalidate(user_ids)
+    transaction.on_commit(lambda: _invalidate(user_ids))
+
+
+def get_my_youth_profile_cache_stats():
+    hits = cache.get(MY_YOUTH_PROFILE_STATS_KEY.format(name="hits"), 0)
+    misses = cache.get(MY_YOUTH_PROFILE_STATS_KEY.format(name="misses"), 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else None,
+    }
@@ -0,0 +1,271 @@
+import csv
+import gzip
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from enumfields import Enum
+from helusers.models import ADGroup
+
+from common_utils.audit_logging import log_bulk
+
+from .importer import chunked, NATURAL_KEY_FIELDS
+from .models import AdditionalContactPerson, YouthProfile
+
+User = get_user_model()
+
+YOUTH_PROFILE_EXPORT_FIELDS = (
+    "id",
+    "membership_number",
+    "user__uuid",
+    "user__first_name",
+    "user__last_name",
+    "user__email",
+    "birth_date",
+    "school_name",
+    "school_class",
+    "expiration",
+    "language_at_home",
+    "approver_first_name",
+    "approver_last_name",
+    "approver_phone",
+    "approver_email",
+    "approval_notification_timestamp",
+    "approved_time",
+    "photo_usage_approved",
+)
+
+CONTACT_PERSON_EXPORT_FIELDS = (
+    "youth_profile_id",
+    "first_name",
+    "last_name",
+    "phone",
+    "email",
+)
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    """Encode enums as their values and timestamps with full precision."""
+
+    def default(self, o):
+        if isinstance(o, Enum):
+            return o.value
+        if isinstance(o, datetime):
+            return o.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+        return super().default(o)
+
+
+def iter_youth_profile_rows(queryset=None, chunk_size=None, user=None):
+    """Yield youth profiles and their additional contact persons as dicts.
+
+    Profiles are read using a server-side cursor and the contact persons are fetched
+    with one query per chunk, so memory use does not depend on the size of the table.
+    Rows are read as values instead of model instances to avoid per row audit events,
+    one aggregated READ event is logged per chunk instead.
+    """
+    if queryset is None:
+        queryset = YouthProfile.objects.all()
+    chunk_size = chunk_size or settings.YOUTH_PROFILE_EXPORT_CHUNK_SIZE
+
+    rows = queryset.order_by().values(*YOUTH_PROFILE_EXPORT_FIELDS)
+    for chunk in chunked(rows.iterator(chunk_size=chunk_size), chunk_size):
+        profile_ids = [row["id"] for row in chunk]
+        contact_persons = {}
+        for contact_person in AdditionalContactPerson.objects.filter(
+            youth_profile_id__in=profile_ids
+        ).values(*CONTACT_PERSON_EXPORT_FIELDS):
+            profile_id = contact_person.pop("youth_profile_id")
+            contact_persons.setdefault(profile_id, []).append(contact_person)
+
+        log_bulk("READ", YouthProfile.__name__, profile_ids, user=user)
+
+        for row in chunk:
+            row["additional_contact_persons"] = contact_persons.get(row["id"], [])
+            yield row
+
+
+def export_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=ExportJSONEncoder) + "\n"
+
+
+class _Echo:
+    """File-like object that returns the written value instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(rows):
+    fieldnames = YOUTH_PROFILE_EXPORT_FIELDS + ("additional_contact_persons",)
+    writer = csv.DictWriter(_Echo(), fieldnames=fieldnames)
+    yield writer.writeheader()
+    for row in rows:
+        row["language_at_home"] = row["language_at_home"].value
+        row["additional_contact_persons"] = json.dumps(
+            row["additional_contact_persons"]
+        )
+        yield writer.writerow(row)
+
+
+class ShardedJSONArrayWriter:
+    """Write objects as JSON arrays to one or more files.
+
+    With a shard size, each file holds at most that many objects and the files are
+    numbered, e.g. youth_data-0001.json.gz. Every file is a complete JSON array.
+    """
+
+    def __init__(self, filename, shard_size=None, compress=False):
+        path = Path(filename)
+        if compress and path.suffix != ".gz":
+            path = path.with_name(f"{path.name}.gz")
+        self.path = path
+        self.shard_size = shard_size
+        self.compress = compress
+        self.filenames = []
+        self._file = None
+        self._count = 0
+
+    def write(self, obj):
+        if self._file is None:
+            self._open()
+        elif self.shard_size and self._count >= self.shard_size:
+            self._close()
+            self._open()
+        else:
+            self._file.write(",")
+        self._file.write("\n")
+        self._file.write(json.dumps(obj, cls=ExportJSONEncoder))
+        self._count += 1
+
+    def close(self):
+        """Close the current file, writing an empty array if nothing was written."""
+        if self._file is None:
+            self._open()
+        self._close()
+
+    def _open(self):
+        if self.shard_size:
+            suffixes = "".join(self.path.suffixes)
+            stem = self.path.name[: -len(suffixes)] if suffixes else self.path.name
+            shard = len(self.filenames) + 1
+            path = self.path.with_name(f"{stem}-{shard:04}{suffixes}")
+        else:
+            path = self.path
+        opener = gzip.open if self.compress else open
+        self._file = opener(path, "wt", encoding="utf-8")
+        self._file.write("[")
+        self._count = 0
+        self.filenames.append(str(path))
+
+    def _close(self):
+        self._file.write("\n]\n")
+        self._file.close()
+
+
+class YouthDataExporter:
+    """Export youth data in the format read by YouthDataImporter.
+
+    The objects are read in chunks from server-side cursors, so memory use doesn't
+    depend on the amount of data. Related objects are referred to with the natural
+    keys of NATURAL_KEY_FIELDS, and they are exported before the objects referring
+    to them. Youth profiles keep their UUID primary keys, the primary keys of other
+    objects are left for the importing database to assign.
+    """
+
+    # Users authenticate with Tunnistamo and their groups and permissions come from
+    # their AD groups when they log in
+    EXCLUDED_FIELDS = {User: {"password", "groups", "user_permissions"}}
+
+    def __init__(self, writer, chunk_size=1000, progress=None):
+        self.writer = writer
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.counts = {}
+
+    def run(self):
+        """Export all objects and return the number exported per model."""
+        with connection.cursor() as cursor:
+            # All models are read from the same snapshot
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+        self.export(ADGroup.objects.all())
+        # Superusers are not replaced by imports
+        self.export(User.objects.filter(is_superuser=False))
+        self.export(YouthProfile.objects.all())
+        self.export(AdditionalContactPerson.objects.all())
+        return self.counts
+
+    def export(self, queryset):
+        model = queryset.model
+        keep_pk = NATURAL_KEY_FIELDS.get(model) == (model._meta.pk.name,)
+        excluded = self.EXCLUDED_FIELDS.get(model, set())
+        fields = [
+            field
+            for field in list(model._meta.concrete_fields)
+            + list(model._meta.many_to_many)
+            if not field.primary_key and field.name not in excluded
+        ]
+        columns = ["pk"]
+        for field in fields:
+            if not field.many_to_many:
+                columns.extend(self._columns(field))
+
+        rows = (
+            queryset.order_by("pk")
+            .values(*columns)
+            .iterator(chunk_size=self.chunk_size)
+        )
+        for chunk in chunked(rows, self.chunk_size):
+            relations = {
+                field: self._get_relations(field, [row["pk"] for row in chunk])
+                for field in fields
+                if field.many_to_many
+            }
+            for row in chunk:
+                record = {"model": model._meta.label_lower}
+                if keep_pk:
+                    record["pk"] = row["pk"]
+                record["fields"] = {
+                    field.name: relations[field].get(row["pk"], [])
+                    if field.many_to_many
+                    else self._value(field, row)
+                    for field in fields
+                }
+                self.writer.write(record)
+
+            if model is YouthProfile:
+                log_bulk("READ", YouthProfile.__name__, [row["pk"] for row in chunk])
+            self.counts[model] = self.counts.get(model, 0) + len(chunk)
+            if self.progress:
+                self.progress(model, len(chunk))
+
+    def _columns(self, field):
+        """Return the columns to read for the field, the natural key of relations."""
+        if field.is_relation and field.remote_field.model in NATURAL_KEY_FIELDS:
+            natural_key = NATURAL_KEY_FIELDS[field.remote_field.model]
+            return [f"{field.name}__{part}" for part in natural_key]
+        return [field.attname]
+
+    def _value(self, field, row):
+        values = [row[column] for column in self._columns(field)]
+        if field.is_relation and field.remote_field.model in NATURAL_KEY_FIELDS:
+            return None if values[0] is None else values
+        return field.get_prep_value(values[0])
+
+    def _get_relations(self, field, pks):
+        """Return the natural keys of the related objects by object pk."""
+        through = field.remote_field.through
+        source = f"{field.m2m_field_name()}_id"
+        target = field.m2m_reverse_field_name()
+        natural_key = NATURAL_KEY_FIELDS[field.remote_field.model]
+        relations = {}
+        for pk, *key in through.objects.filter(**{f"{source}__in": pks}).values_list(
+            source, *[f"{target}__{part}" for part in natural_key]
+        ):
+            relations.setdefault(pk, []).append(key)
+        return relations
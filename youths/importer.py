@@ -0,0 +1,606 @@
+import gzip
+import hashlib
+import json
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from enum import Enum
+from itertools import islice
+
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models.signals import post_init
+from helusers.models import ADGroup
+
+from common_utils.audit_logging import log_bulk, post_init_audit_log
+
+from .cache import invalidate_my_youth_profiles
+from .models import AdditionalContactPerson, YouthProfile
+
+User = get_user_model()
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Fields of the natural keys used in the exported data, in natural key order
+NATURAL_KEY_FIELDS = {
+    User: ("uuid",),
+    ADGroup: ("name",),
+    Group: ("name",),
+    Permission: ("codename", "content_type__app_label", "content_type__model"),
+    YouthProfile: ("id",),
+}
+
+
+def iter_json_array(infile, read_size=64 * 1024):
+    """Yield the items of the JSON array in the file one at a time.
+
+    Only the item being decoded and one read of the file are kept in memory. Items
+    are decoded in place, and the buffer is only trimmed when more is read.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    index = 0
+    started = False
+    while True:
+        index = WHITESPACE.match(buffer, index).end()
+        if buffer.startswith("," if started else "[", index):
+            started = True
+            index += 1
+            continue
+        if index < len(buffer) and not started:
+            raise ValueError("The data is not a JSON array")
+        if buffer.startswith("]", index):
+            return
+
+        decoded = _decode_item(decoder, buffer, index)
+        if decoded:
+            item, index = decoded
+            yield item
+            continue
+
+        data = infile.read(read_size)
+        if not data:
+            if index < len(buffer):
+                # Raise the decoder's error for the incomplete item
+                decoder.raw_decode(buffer, index)
+            raise ValueError("Unexpected end of the JSON array")
+        buffer = buffer[index:] + data
+        index = 0
+
+
+def read_records(filenames):
+    """Yield the objects of the export files in order.
+
+    Files with a .gz suffix are decompressed while reading.
+    """
+    for filename in filenames:
+        opener = gzip.open if str(filename).endswith(".gz") else open
+        with opener(filename, "rt") as infile:
+            yield from iter_json_array(infile)
+
+
+def _decode_item(decoder, buffer, index):
+    """Return the item at the index of the buffer and its end, or None if incomplete."""
+    if index >= len(buffer):
+        return None
+    try:
+        return decoder.raw_decode(buffer, index)
+    except json.JSONDecodeError:
+        return None
+
+
+def chunked(items, size):
+    """Return an iterator of lists of at most size items."""
+    iterator = iter(items)
+    return iter(lambda: list(islice(iterator, size)), [])
+
+
+@contextmanager
+def youth_profile_reads_not_logged():
+    """Don't audit log every youth profile instance created for bulk operations.
+
+    The callers log the bulk operation instead.
+    """
+    post_init.disconnect(post_init_audit_log, YouthProfile)
+    try:
+        yield
+    finally:
+        post_init.connect(post_init_audit_log, YouthProfile)
+
+
+class YouthDataImporter:
+    """Bulk create the objects of a Django serializer JSON export.
+
+    The objects are read one at a time and created with a bulk insert per chunk of
+    objects of the same model. Related objects must come before the objects referring
+    to them, as they do in exports. Natural keys are resolved from in-memory maps of
+    natural key values to primary keys, loaded with one query per related model and
+    extended with the created objects, so memory use only grows with the number of
+    referenced objects.
+    """
+
+    def __init__(self, chunk_size=1000, progress=None, natural_keys=None):
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.counts = {}
+        self.max_membership_number = 0
+        self._natural_keys = {} if natural_keys is None else natural_keys
+
+    def run(self, records):
+        """Import the objects and return the number created per model."""
+        self.import_records(records)
+        reset_sequences(list(self.counts))
+        return self.counts
+
+    def import_records(self, records):
+        model = None
+        chunk = []
+        with youth_profile_reads_not_logged():
+            for record in records:
+                record_model = apps.get_model(record["model"])
+                if record_model is not model or len(chunk) >= self.chunk_size:
+                    self._create(model, chunk)
+                    model = record_model
+                    chunk = []
+                chunk.append(self._build(model, record))
+            self._create(model, chunk)
+
+    def _build(self, model, record):
+        data = {}
+        many_to_many = {}
+        if "pk" in record:
+            data[model._meta.pk.attname] = model._meta.pk.to_python(record["pk"])
+
+        for name, value in record["fields"].items():
+            field = model._meta.get_field(name)
+            if field.many_to_many:
+                related_model = field.remote_field.model
+                many_to_many[field] = [
+                    self._resolve(related_model, related) for related in value
+                ]
+            elif field.is_relation:
+                data[field.attname] = (
+                    None
+                    if value is None
+                    else self._resolve(field.remote_field.model, value)
+                )
+            else:
+                data[field.attname] = field.to_python(value)
+
+        if model is YouthProfile:
+            # Approval tokens are not carried over from the exporting system
+            data["approval_token"] = ""
+        return model(**data), many_to_many
+
+    def _resolve(self, model, value):
+        """Return the primary key of the related object."""
+        if not isinstance(value, list):
+            return model._meta.pk.to_python(value)
+        if NATURAL_KEY_FIELDS.get(model) == (model._meta.pk.name,):
+            return model._meta.pk.to_python(value[0])
+
+        natural_keys = self._get_natural_keys(model)
+        key = tuple(str(part) for part in value)
+        try:
+            return natural_keys[key]
+        except KeyError:
+            raise ValueError(f"{model._meta.label} {value} does not exist")
+
+    def _get_natural_keys(self, model):
+        if model not in self._natural_keys:
+            if model not in NATURAL_KEY_FIELDS:
+                raise ValueError(f"Natural keys of {model._meta.label} not supported")
+            fields = NATURAL_KEY_FIELDS[model]
+            self._natural_keys[model] = {
+                tuple(str(part) for part in values): pk
+                for *values, pk in model.objects.values_list(*fields, "pk")
+            }
+        return self._natural_keys[model]
+
+    def _create(self, model, chunk):
+        if not chunk:
+            return
+
+        objs = model.objects.bulk_create(obj for obj, many_to_many in chunk)
+        self._create_relations(chunk)
+
+        if model in self._natural_keys:
+            fields = NATURAL_KEY_FIELDS[model]
+            if any("__" in field for field in fields):
+                # Reload the keys spanning relations when they are needed next
+                del self._natural_keys[model]
+            else:
+                self._natural_keys[model].update(
+                    (tuple(str(getattr(obj, field)) for field in fields), obj.pk)
+                    for obj in objs
+                )
+        if model is YouthProfile:
+            self.max_membership_number = max(
+                [self.max_membership_number]
+                + [int(obj.membership_number) for obj in objs if obj.membership_number]
+            )
+            log_bulk("CREATE", YouthProfile.__name__, [obj.pk for obj in objs])
+
+        self.counts[model] = self.counts.get(model, 0) + len(objs)
+        if self.progress:
+            self.progress(model, len(objs))
+
+    def _create_relations(self, chunk):
+        for field in {field for obj, many_to_many in chunk for field in many_to_many}:
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            through.objects.bulk_create(
+                through(**{source: obj.pk, target: related_pk})
+                for obj, many_to_many in chunk
+                for related_pk in many_to_many.get(field, ())
+            )
+
+
+def reset_sequences(models):
+    """Continue the primary key sequences of the models after the imported keys."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+# Natural key maps of a worker process, shared by the partitions it imports
+_worker_natural_keys = {}
+
+
+def _init_worker():
+    django.setup()
+    _worker_natural_keys.clear()
+
+
+def _import_partition(records):
+    importer = YouthDataImporter(len(records), natural_keys=_worker_natural_keys)
+    with transaction.atomic():
+        importer.import_records(records)
+    counts = {model._meta.label: count for model, count in importer.counts.items()}
+    return counts, importer.max_membership_number
+
+
+class ParallelYouthDataImporter:
+    """Import a JSON export with a pool of worker processes.
+
+    The objects are imported in stages, so that the objects referred to are
+    created before the objects referring to them. Each stage reads the files again
+    and hands the objects of its model to the workers in partitions, which each
+    worker creates in its own transaction. The objects of other models, like AD
+    groups, are created by the calling process before the stages.
+
+    Unlike YouthDataImporter, the import is not atomic. Partitions created before a
+    failure stay in the database.
+    """
+
+    STAGES = (
+        ("users.user", "users"),
+        ("youths.youthprofile", "youth profiles"),
+        ("youths.additionalcontactperson", "contact persons"),
+    )
+
+    def __init__(self, workers, chunk_size=1000, progress=None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.counts = {}
+        self.max_membership_number = 0
+        # Number of objects created and the duration in seconds of each stage
+        self.stages = {}
+
+    def run(self, filenames):
+        """Import the objects of the files and return the number created per model."""
+        stage_labels = {label for label, name in self.STAGES}
+        with transaction.atomic():
+            importer = YouthDataImporter(self.chunk_size)
+            importer.import_records(
+                record
+                for record in read_records(filenames)
+                if record["model"] not in stage_labels
+            )
+        for model, count in importer.counts.items():
+            self.counts[model._meta.label] = count
+
+        for label, name in self.STAGES:
+            created = self.counts.get(label, 0)
+            started = time.perf_counter()
+            self._run_stage(filenames, label, name)
+            self.stages[name] = (
+                self.counts.get(label, 0) - created,
+                time.perf_counter() - started,
+            )
+
+        reset_sequences([apps.get_model(label) for label in self.counts])
+        return {apps.get_model(label): count for label, count in self.counts.items()}
+
+    def _run_stage(self, filenames, label, name):
+        # Forked workers must not share the connection of this process
+        connections.close_all()
+        pending = set()
+        with ProcessPoolExecutor(self.workers, initializer=_init_worker) as executor:
+            records = (
+                record for record in read_records(filenames) if record["model"] == label
+            )
+            for partition in chunked(records, self.chunk_size):
+                # Keep a bounded number of partitions in memory
+                if len(pending) >= 2 * self.workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done, name)
+                pending.add(executor.submit(_import_partition, partition))
+            self._collect(wait(pending).done, name)
+
+    def _collect(self, futures, name):
+        for future in futures:
+            counts, max_membership_number = future.result()
+            for label, count in counts.items():
+                self.counts[label] = self.counts.get(label, 0) + count
+            self.max_membership_number = max(
+                self.max_membership_number, max_membership_number
+            )
+            if self.progress:
+                self.progress(name, sum(counts.values()))
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+def _content_hash(values):
+    return hashlib.sha1(
+        json.dumps(values, default=_json_default).encode("utf-8")
+    ).digest()
+
+
+class IncrementalYouthDataImporter(YouthDataImporter):
+    """Synchronize the objects in the database with a JSON export.
+
+    Objects are matched by their identity field, like the UUID of users and youth
+    profiles. Only the fields present in a record are compared and written, so the
+    stored values of the fields missing from it are kept. The identities and content
+    hashes of the objects in the database are loaded with one streamed query per
+    model and set of fields in the records. Objects with an unchanged content hash
+    are skipped, new objects are bulk created and changed objects bulk updated.
+    Afterwards the objects missing from the export are deleted, which only concerns
+    the models present in the export. Superusers are never deleted.
+
+    Contact persons have no identity of their own, so they are matched by their
+    content, including the youth profile. A changed contact person is deleted and
+    created again.
+    """
+
+    # Field identifying the object in both systems, None to match by content
+    IDENTITY_FIELDS = {
+        User: "uuid",
+        ADGroup: "name",
+        YouthProfile: "id",
+        AdditionalContactPerson: None,
+    }
+    # Fields the importing system manages itself
+    NOT_SYNCED_FIELDS = {
+        User: {"password", "last_login", "groups", "user_permissions"},
+        YouthProfile: {"approval_token"},
+    }
+
+    def __init__(self, chunk_size=1000, progress=None):
+        super().__init__(chunk_size)
+        self.sync_progress = progress
+        # Number of created, updated, unchanged and deleted objects per model
+        self.changes = {}
+        self._fields = {}
+        self._existing = {}
+        self._matched = {}
+        self._changed_profile_ids = set()
+
+    def run(self, records):
+        """Synchronize the objects and return the changes per model."""
+        self.import_records(records)
+        self._delete_missing()
+        reset_sequences(list(self.changes))
+        self._invalidate_changed_profiles()
+        return self.changes
+
+    def _build(self, model, record):
+        if model not in self._fields:
+            if model not in self.IDENTITY_FIELDS:
+                raise ValueError(f"{model._meta.label} can't be imported incrementally")
+            not_synced = self.NOT_SYNCED_FIELDS.get(model, set())
+            self._fields[model] = [
+                field
+                for field in list(model._meta.concrete_fields)
+                + list(model._meta.many_to_many)
+                if not field.primary_key and field.name not in not_synced
+            ]
+            self._matched[model] = set()
+            self.changes[model] = dict.fromkeys(
+                ("created", "updated", "unchanged", "deleted"), 0
+            )
+        obj, many_to_many = super()._build(model, record)
+        # The synchronized fields present in the record
+        obj._synced_fields = tuple(
+            field for field in self._fields[model] if field.name in record["fields"]
+        )
+        return obj, many_to_many
+
+    def _create(self, model, chunk):
+        if not chunk:
+            return
+
+        if model is YouthProfile:
+            self.max_membership_number = max(
+                [self.max_membership_number]
+                + [
+                    int(obj.membership_number)
+                    for obj, _ in chunk
+                    if obj.membership_number
+                ]
+            )
+
+        created, updated = self._match(model, chunk)
+        super()._create(model, created)
+        self._update(model, updated)
+
+        changes = self.changes[model]
+        changes["created"] += len(created)
+        changes["updated"] += len(updated)
+        changes["unchanged"] += len(chunk) - len(created) - len(updated)
+        if model is YouthProfile:
+            self._changed_profile_ids.update(obj.pk for obj, _ in created + updated)
+        elif model is AdditionalContactPerson:
+            self._changed_profile_ids.update(obj.youth_profile_id for obj, _ in created)
+        if self.sync_progress:
+            self.sync_progress(model, len(chunk))
+
+    def _match(self, model, chunk):
+        """Split the chunk to the objects to create and to update."""
+        identity = self.IDENTITY_FIELDS[model]
+        matched = self._matched[model]
+        created = []
+        updated = []
+        for obj, many_to_many in chunk:
+            fields = obj._synced_fields
+            existing = self._get_existing(model, fields)
+            content_hash = self._hash(fields, obj, many_to_many)
+            if identity is None:
+                pk = next(
+                    (pk for pk in existing.get(content_hash, ()) if pk not in matched),
+                    None,
+                )
+                if pk is None:
+                    obj.pk = None
+                    created.append((obj, many_to_many))
+                else:
+                    matched.add(pk)
+                continue
+
+            match = existing.get(str(getattr(obj, identity)))
+            if match is None:
+                if identity != model._meta.pk.name:
+                    obj.pk = None
+                created.append((obj, many_to_many))
+                continue
+
+            matched.add(match[0])
+            if match[1] != content_hash:
+                obj.pk = match[0]
+                updated.append((obj, many_to_many))
+        return created, updated
+
+    def _hash(self, fields, obj, many_to_many):
+        return _content_hash(
+            [
+                sorted(many_to_many.get(field, ()))
+                if field.many_to_many
+                else getattr(obj, field.attname)
+                for field in fields
+            ]
+        )
+
+    def _get_existing(self, model, fields):
+        """Return the pks and content hashes of the objects by their identity.
+
+        The content hashes cover the given fields. Objects matched by content are
+        returned as lists of pks by content hash.
+        """
+        if (model, fields) in self._existing:
+            return self._existing[model, fields]
+
+        identity = self.IDENTITY_FIELDS[model]
+        relations = {
+            field: self._get_relations(field) for field in fields if field.many_to_many
+        }
+        attnames = [field.attname for field in fields if not field.many_to_many]
+        existing = {}
+        for row in model.objects.values(
+            *dict.fromkeys(["pk", *attnames, identity or "pk"])
+        ).iterator(chunk_size=self.chunk_size):
+            content_hash = _content_hash(
+                [
+                    sorted(relations[field].get(row["pk"], ()))
+                    if field.many_to_many
+                    else row[field.attname]
+                    for field in fields
+                ]
+            )
+            if identity is None:
+                existing.setdefault(content_hash, []).append(row["pk"])
+            else:
+                existing[str(row[identity])] = (row["pk"], content_hash)
+
+        self._existing[model, fields] = existing
+        return existing
+
+    def _get_relations(self, field):
+        through = field.remote_field.through
+        relations = {}
+        for source, target in through.objects.values_list(
+            f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"
+        ).iterator(chunk_size=self.chunk_size):
+            relations.setdefault(source, []).append(target)
+        return relations
+
+    def _update(self, model, chunk):
+        if not chunk:
+            return
+
+        by_fields = {}
+        for obj, many_to_many in chunk:
+            by_fields.setdefault(obj._synced_fields, []).append((obj, many_to_many))
+        for fields, updated in by_fields.items():
+            objs = [obj for obj, _ in updated]
+            concrete_fields = [field.name for field in fields if not field.many_to_many]
+            if concrete_fields:
+                model.objects.bulk_update(objs, concrete_fields)
+            for field in fields:
+                if field.many_to_many:
+                    through = field.remote_field.through
+                    source = f"{field.m2m_field_name()}_id"
+                    through.objects.filter(
+                        **{f"{source}__in": [obj.pk for obj in objs]}
+                    ).delete()
+        self._create_relations(chunk)
+
+        if model is YouthProfile:
+            log_bulk("UPDATE", YouthProfile.__name__, [obj.pk for obj, _ in chunk])
+
+    def _delete_missing(self):
+        """Delete the objects missing from the export, referring objects first."""
+        for model in reversed(list(self.IDENTITY_FIELDS)):
+            if model not in self._matched:
+                continue
+            pks = set()
+            for (existing_model, fields), existing in self._existing.items():
+                if existing_model is not model:
+                    continue
+                if self.IDENTITY_FIELDS[model] is None:
+                    pks.update(pk for matches in existing.values() for pk in matches)
+                else:
+                    pks.update(pk for pk, _ in existing.values())
+            pks -= self._matched[model]
+            queryset = model.objects.all()
+            if model is User:
+                queryset = queryset.filter(is_superuser=False)
+
+            for chunk in chunked(pks, self.chunk_size):
+                _, counts = queryset.filter(pk__in=chunk).delete()
+                self.changes[model]["deleted"] += counts.get(model._meta.label, 0)
+
+    def _invalidate_changed_profiles(self):
+        for profile_ids in chunked(self._changed_profile_ids, self.chunk_size):
+            invalidate_my_youth_profiles(
+                YouthProfile.objects.filter(pk__in=profile_ids).values_list(
+                    "user_id", flat=True
+                )
+            )
@@ -0,0 +1,117 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from youths.models import YouthProfile
+
+# Share of the synthetic profiles which are waiting for approval and have a token
+PENDING_APPROVAL_EVERY = 10
+
+INSERT_SYNTHETIC_PROFILES_SQL = """
+    INSERT INTO {table} (
+        id, membership_number, birth_date, school_name, school_class, expiration,
+        language_at_home, approver_first_name, approver_last_name, approver_phone,
+        approver_email, approval_token, profile_access_token
+    )
+    SELECT
+        md5('youth-profile-' || i || random()::text)::uuid,
+        'B' || lpad(i::text, 7, '0'),
+        DATE '2005-01-01' + (i %% 3650),
+        '', '', DATE '2030-07-31', 'fi', '', '', '', '',
+        CASE WHEN i %% {pending_every} = 0
+            THEN md5('approval-token-' || i || random()::text)::uuid::text
+            ELSE ''
+        END,
+        ''
+    FROM generate_series(1, %s) AS i
+"""
+
+DISABLE_INDEX_SCANS_SQL = """
+    SET LOCAL enable_indexscan = off;
+    SET LOCAL enable_indexonlyscan = off;
+    SET LOCAL enable_bitmapscan = off;
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark looking up youth profiles by approval token against a synthetic "
+        "table. The synthetic rows are rolled back when the benchmark finishes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1_000_000,
+            help="Number of synthetic youth profiles to insert",
+        )
+        parser.add_argument(
+            "--lookups", type=int, default=1000, help="Number of indexed lookups"
+        )
+        parser.add_argument(
+            "--baseline-lookups",
+            type=int,
+            default=10,
+            help="Number of lookups without the index, 0 skips the baseline",
+        )
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            self._insert_synthetic_profiles(kwargs["rows"])
+            tokens = self._sample_tokens(kwargs["lookups"])
+            if not tokens:
+                raise CommandError("Too few rows to have any approval tokens.")
+
+            queryset = YouthProfile.objects.exclude(approval_token="").filter(
+                approval_token=tokens[0]
+            )
+            self.stdout.write(queryset.explain())
+            self._report("Indexed lookup", self._time_lookups(tokens))
+
+            if kwargs["baseline_lookups"]:
+                with connection.cursor() as cursor:
+                    cursor.execute(DISABLE_INDEX_SCANS_SQL)
+                baseline_tokens = tokens[: kwargs["baseline_lookups"]]
+                self._report("Sequential scan", self._time_lookups(baseline_tokens))
+
+            transaction.set_rollback(True)
+
+    def _insert_synthetic_profiles(self, rows):
+        self.stdout.write(f"Inserting {rows} synthetic youth profiles...")
+        table = connection.ops.quote_name(YouthProfile._meta.db_table)
+        sql = INSERT_SYNTHETIC_PROFILES_SQL.format(
+            table=table, pending_every=PENDING_APPROVAL_EVERY
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [rows])
+            cursor.execute(f"ANALYZE {table}")
+
+    def _sample_tokens(self, count):
+        return list(
+            YouthProfile.objects.exclude(approval_token="")
+            .order_by("?")
+            .values_list("approval_token", flat=True)[:count]
+        )
+
+    def _time_lookups(self, tokens):
+        durations = []
+        for token in tokens:
+            started = time.perf_counter()
+            YouthProfile.objects.by_approval_token(token)
+            durations.append((time.perf_counter() - started) * 1000)
+        return durations
+
+    def _report(self, title, durations):
+        durations = sorted(durations)
+        p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{title}: {len(durations)} lookups, "
+                f"mean {statistics.mean(durations):.3f} ms, "
+                f"p50 {statistics.median(durations):.3f} ms, "
+                f"p99 {p99:.3f} ms"
+            )
+        )
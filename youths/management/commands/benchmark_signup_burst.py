@@ -0,0 +1,269 @@
+import json
+import queue
+import statistics
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.client import RequestFactory
+from django.utils import timezone
+from graphql_relay import to_global_id
+
+from youth_membership.schema import schema
+from youths.models import YouthProfile
+
+User = get_user_model()
+
+USERNAME_PREFIX = "signup-burst-"
+
+STUB_HOSTS = ("127.0.0.1", "localhost")
+
+CREATE_MY_YOUTH_PROFILE_MUTATION = """
+    mutation CreateMyYouthProfile($input: CreateMyYouthProfileMutationInput!) {
+        createMyYouthProfile(input: $input) {
+            youthProfile {
+                membershipNumber
+            }
+        }
+    }
+"""
+
+LOCK_WAITS_SQL = """
+    SELECT count(*)
+      FROM pg_stat_activity
+     WHERE datname = current_database()
+       AND wait_event_type = 'Lock'
+"""
+
+
+class ProfileAPIStubHandler(BaseHTTPRequestHandler):
+    """Answers the Helsinki profile API queries made when creating a youth profile."""
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        query = json.loads(self.rfile.read(length))["query"]
+        time.sleep(self.server.latency)
+
+        if "createMyProfileTemporaryReadAccessToken" in query:
+            expires_at = timezone.now() + timedelta(days=2)
+            data = {
+                "createMyProfileTemporaryReadAccessToken": {
+                    "temporaryReadAccessToken": {
+                        "token": str(uuid.uuid4()),
+                        "expiresAt": expires_at.isoformat(),
+                    }
+                }
+            }
+        else:
+            data = {
+                "myProfile": {
+                    "id": to_global_id("ProfileNode", uuid.uuid4()),
+                    "firstName": "Signup",
+                    "lastName": "Burst",
+                }
+            }
+
+        body = json.dumps({"data": data}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark a burst of concurrent createMyYouthProfile mutations against the "
+        "configured database and a local Helsinki profile API stub, which is started "
+        "at HELSINKI_PROFILE_API_URL, e.g. http://127.0.0.1:8099/. Meant for local "
+        "databases only, the created users and youth profiles are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--signups", type=int, default=500, help="Number of profiles to create"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=50, help="Number of parallel signups"
+        )
+        parser.add_argument(
+            "--minor-ratio",
+            type=float,
+            default=0.5,
+            help="Share of minors, who need a guardian's approval",
+        )
+        parser.add_argument(
+            "--profile-api-latency",
+            type=float,
+            default=0.05,
+            help="Response time of the profile API stub in seconds",
+        )
+        parser.add_argument(
+            "--lock-sample-interval",
+            type=float,
+            default=0.01,
+            help="How often to sample backends waiting for locks, in seconds",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the created users and profiles"
+        )
+
+    def handle(self, *args, **kwargs):
+        profile_api_url = urlsplit(settings.HELSINKI_PROFILE_API_URL)
+        if profile_api_url.hostname not in STUB_HOSTS or not profile_api_url.port:
+            raise CommandError(
+                "HELSINKI_PROFILE_API_URL must point to a local port for the profile "
+                "API stub, e.g. http://127.0.0.1:8099/."
+            )
+
+        stub = ThreadingHTTPServer(
+            (profile_api_url.hostname, profile_api_url.port), ProfileAPIStubHandler
+        )
+        stub.latency = kwargs["profile_api_latency"]
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        users = self._create_users(kwargs["signups"])
+
+        try:
+            results, lock_waits, duration = self._run_burst(
+                users,
+                kwargs["concurrency"],
+                kwargs["minor_ratio"],
+                kwargs["lock_sample_interval"],
+            )
+            self._report(results, lock_waits, duration, kwargs["lock_sample_interval"])
+            self._report_membership_numbers(users)
+        finally:
+            stub.shutdown()
+            stub.server_close()
+            if not kwargs["keep"]:
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def _create_users(self, count):
+        uuids = [uuid.uuid4() for _ in range(count)]
+        User.objects.bulk_create(
+            User(username=f"{USERNAME_PREFIX}{user_uuid}", uuid=user_uuid)
+            for user_uuid in uuids
+        )
+        return list(User.objects.filter(uuid__in=uuids))
+
+    def _run_burst(self, users, concurrency, minor_ratio, lock_sample_interval):
+        signups = queue.Queue()
+        minor_every = round(1 / minor_ratio) if minor_ratio else 0
+        for i, user in enumerate(users):
+            signups.put((user, bool(minor_every) and i % minor_every == 0))
+
+        results = []
+        lock_waits = []
+        done = threading.Event()
+
+        monitor = threading.Thread(
+            target=self._sample_lock_waits,
+            args=(lock_waits, lock_sample_interval, done),
+        )
+        workers = [
+            threading.Thread(target=self._sign_up, args=(signups, results))
+            for _ in range(concurrency)
+        ]
+
+        started = time.perf_counter()
+        monitor.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        duration = time.perf_counter() - started
+        done.set()
+        monitor.join()
+
+        return results, lock_waits, duration
+
+    def _sign_up(self, signups, results):
+        request_factory = RequestFactory()
+        try:
+            while True:
+                try:
+                    user, minor = signups.get_nowait()
+                except queue.Empty:
+                    return
+
+                age = 16 if minor else 20
+                variables = {
+                    "input": {
+                        "profileApiToken": "token",
+                        "youthProfile": {
+                            "birthDate": date(
+                                date.today().year - age, 1, 1
+                            ).isoformat(),
+                            "approverEmail": "approver@example.com",
+                        },
+                    }
+                }
+                request = request_factory.post("/graphql/")
+                request.user = user
+
+                started = time.perf_counter()
+                executed = schema.execute(
+                    CREATE_MY_YOUTH_PROFILE_MUTATION,
+                    variables=variables,
+                    context=request,
+                )
+                results.append((time.perf_counter() - started, not executed.errors))
+        finally:
+            connection.close()
+
+    def _sample_lock_waits(self, lock_waits, interval, done):
+        try:
+            with connection.cursor() as cursor:
+                while not done.is_set():
+                    cursor.execute(LOCK_WAITS_SQL)
+                    lock_waits.append(cursor.fetchone()[0])
+                    time.sleep(interval)
+        finally:
+            connection.close()
+
+    def _report(self, results, lock_waits, duration, lock_sample_interval):
+        latencies = sorted(latency * 1000 for latency, _ in results)
+        succeeded = sum(1 for _, success in results if success)
+
+        self.stdout.write(
+            f"{len(results)} signups in {duration:.2f} s, {succeeded} succeeded, "
+            f"{len(results) - succeeded} failed"
+        )
+        if latencies:
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(f"Throughput: {len(results) / duration:.1f} signups/s")
+            self.stdout.write(
+                f"Latency: p50 {statistics.median(latencies):.1f} ms, "
+                f"p99 {p99:.1f} ms, max {latencies[-1]:.1f} ms"
+            )
+        self.stdout.write(
+            f"Lock waits: max {max(lock_waits, default=0)} backends waiting, "
+            f"~{sum(lock_waits) * lock_sample_interval:.2f} s waited in total"
+        )
+
+    def _report_membership_numbers(self, users):
+        numbers = sorted(
+            int(number)
+            for number in YouthProfile.objects.filter(user__in=users).values_list(
+                "membership_number", flat=True
+            )
+        )
+        duplicates = len(numbers) - len(set(numbers))
+        gaps = numbers[-1] - numbers[0] + 1 - len(set(numbers)) if numbers else 0
+        message = (
+            f"Membership numbers: {duplicates} duplicates, {gaps} gaps "
+            f"between {numbers[0] if numbers else '-'} and "
+            f"{numbers[-1] if numbers else '-'}"
+        )
+        style = self.style.ERROR if duplicates else self.style.SUCCESS
+        self.stdout.write(style(message))
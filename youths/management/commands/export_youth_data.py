@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from youths.export import ShardedJSONArrayWriter, YouthDataExporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Export youth data to JSON files in the format read by the import_youth_data "
+        "command. Superusers are not exported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("filename", type=str)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of objects to read with one query",
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Compress the files with gzip"
+        )
+        parser.add_argument(
+            "--shard-size",
+            type=int,
+            help="Split the export to numbered files of at most this many objects",
+        )
+
+    def handle(self, *args, **kwargs):
+        self._started = time.perf_counter()
+        self._exported = 0
+        writer = ShardedJSONArrayWriter(
+            kwargs["filename"], kwargs["shard_size"], kwargs["gzip"]
+        )
+        exporter = YouthDataExporter(
+            writer, kwargs["chunk_size"], progress=self._progress
+        )
+
+        try:
+            with transaction.atomic():
+                counts = exporter.run()
+        finally:
+            writer.close()
+
+        summary = ", ".join(
+            f"{count} {model._meta.verbose_name_plural}"
+            for model, count in counts.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully exported {summary} to {', '.join(writer.filenames)}"
+            )
+        )
+
+    def _progress(self, model, count):
+        self._exported += count
+        elapsed = time.perf_counter() - self._started
+        self.stdout.write(
+            f"Exported {count} {model._meta.verbose_name_plural}, "
+            f"{self._exported} objects in total ({self._exported / elapsed:.0f}/s)"
+        )
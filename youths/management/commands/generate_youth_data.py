@@ -0,0 +1,229 @@
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from common_utils.audit_logging import log_bulk
+from youths.enums import YouthLanguage
+from youths.importer import youth_profile_reads_not_logged
+from youths.models import AdditionalContactPerson, calculate_expiration, YouthProfile
+
+User = get_user_model()
+
+FIRST_NAMES = (
+    "Aino Eino Helmi Leo Ella Oliver Sofia Elias Olivia Onni Aada Väinö Lilja Eetu "
+    "Emma Ahmed Amina Ivan"
+).split()
+LAST_NAMES = (
+    "Korhonen Virtanen Mäkinen Nieminen Mäkelä Hämäläinen Laine Heikkinen Koskinen "
+    "Järvinen Lindqvist Hassan"
+).split()
+SCHOOLS = (
+    "Kontulan Alakoulu",
+    "Ressu",
+    "Kallion lukio",
+    "Vuosaaren peruskoulu",
+    "Brändö gymnasium",
+    "Itäkeskuksen peruskoulu",
+    "Munkkiniemen yhteiskoulu",
+)
+
+APPROVAL_STATES = ("approved", "pending", "unnotified")
+SEASONS = ("current", "previous", "older")
+
+
+def weights(choices):
+    """Return an argparse type parsing weights like "fi=70,sv=10" for the choices."""
+
+    def parse(value):
+        parsed = {}
+        for item in value.split(","):
+            choice, _, weight = item.partition("=")
+            if choice not in choices:
+                raise ValueError(f"{choice} is not one of {', '.join(choices)}")
+            parsed[choice] = float(weight)
+        return parsed
+
+    parse.__name__ = "weights"
+    return parse
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, youth profiles and contact persons for performance "
+        "testing. The data is the same for the same seed, apart from the membership "
+        "numbers, which come from the membership number sequence."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", type=int, default=100_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--today",
+            type=date.fromisoformat,
+            default=date.today(),
+            help="Date the ages and seasons are relative to, YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of profiles to create in one transaction",
+        )
+        parser.add_argument(
+            "--ages",
+            type=int,
+            nargs=2,
+            default=[8, 29],
+            metavar=("MIN", "MAX"),
+            help="Ages of the youths are distributed evenly between these",
+        )
+        parser.add_argument(
+            "--languages",
+            type=weights([language.value for language in YouthLanguage]),
+            default={"fi": 75, "sv": 6, "en": 6, "ru": 4, "so": 3, "ar": 3, "et": 3},
+            help="Weights of the home languages, e.g. fi=75,sv=6,en=6",
+        )
+        parser.add_argument(
+            "--approval-states",
+            type=weights(APPROVAL_STATES),
+            default={"approved": 85, "pending": 12, "unnotified": 3},
+            help=(
+                "Weights of approved profiles, profiles waiting for a guardian's "
+                "approval and profiles whose guardian wasn't notified yet"
+            ),
+        )
+        parser.add_argument(
+            "--expirations",
+            type=weights(SEASONS),
+            default={"current": 70, "previous": 20, "older": 10},
+            help=(
+                "Weights of memberships expiring at the end of the current season, "
+                "having expired at the end of the previous one or earlier"
+            ),
+        )
+        parser.add_argument(
+            "--contact-persons",
+            type=weights(["0", "1", "2", "3"]),
+            default={"0": 60, "1": 30, "2": 8, "3": 2},
+            help="Weights of the number of additional contact persons per profile",
+        )
+
+    def handle(self, *args, **kwargs):
+        self.random = random.Random(kwargs["seed"])
+        self.options = kwargs
+        self.username_prefix = f"synthetic-{kwargs['seed']}-"
+        if User.objects.filter(username__startswith=self.username_prefix).exists():
+            raise CommandError(
+                f"Data with seed {kwargs['seed']} exists already, use another seed."
+            )
+
+        started = time.perf_counter()
+        created = 0
+        while created < kwargs["profiles"]:
+            count = min(kwargs["chunk_size"], kwargs["profiles"] - created)
+            with transaction.atomic(), youth_profile_reads_not_logged():
+                self._create_chunk(created, count)
+            created += count
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Created {created} youth profiles ({created / elapsed:.0f}/s)"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully created {created} users and youth profiles in "
+                f"{time.perf_counter() - started:.1f} s"
+            )
+        )
+
+    def _create_chunk(self, start, count):
+        users = User.objects.bulk_create(self._user(start + i) for i in range(count))
+        membership_numbers = YouthProfile.membership_number_sequence.get_values(count)
+        profiles = YouthProfile.objects.bulk_create(
+            self._youth_profile(user, membership_number)
+            for user, membership_number in zip(users, membership_numbers)
+        )
+        AdditionalContactPerson.objects.bulk_create(
+            self._contact_person(profile)
+            for profile in profiles
+            for _ in range(int(self._choose("contact_persons")))
+        )
+        log_bulk("CREATE", YouthProfile.__name__, [profile.pk for profile in profiles])
+
+    def _choose(self, option):
+        choices = self.options[option]
+        return self.random.choices(list(choices), list(choices.values()))[0]
+
+    def _uuid(self):
+        return uuid.UUID(int=self.random.getrandbits(128), version=4)
+
+    def _user(self, index):
+        username = f"{self.username_prefix}{index}"
+        return User(
+            username=username,
+            uuid=self._uuid(),
+            first_name=self.random.choice(FIRST_NAMES),
+            last_name=self.random.choice(LAST_NAMES),
+            email=f"{username}@example.com",
+        )
+
+    def _youth_profile(self, user, membership_number):
+        today = self.options["today"]
+        min_age, max_age = self.options["ages"]
+        birth_date = today - timedelta(
+            days=self.random.randint(min_age * 365, (max_age + 1) * 365 - 1)
+        )
+        expiration = calculate_expiration(today)
+        season = self._choose("expirations")
+        if season != "current":
+            years = 1 if season == "previous" else self.random.randint(2, 5)
+            expiration = expiration.replace(year=expiration.year - years)
+        # Signed up or renewed during the season
+        signup_date = expiration - timedelta(days=self.random.randint(30, 360))
+        signed_up = datetime(
+            signup_date.year,
+            signup_date.month,
+            signup_date.day,
+            12,
+            tzinfo=timezone.utc,
+        )
+
+        state = self._choose("approval_states")
+        return YouthProfile(
+            user=user,
+            membership_number=str(membership_number).zfill(
+                settings.YOUTH_MEMBERSHIP_NUMBER_LENGTH
+            ),
+            birth_date=birth_date,
+            school_name=self.random.choice(SCHOOLS),
+            school_class=f"{self.random.randint(1, 9)}{self.random.choice('ABC')}",
+            expiration=expiration,
+            language_at_home=YouthLanguage(self._choose("languages")),
+            approver_first_name=self.random.choice(FIRST_NAMES),
+            approver_last_name=user.last_name,
+            approver_phone=f"040{self.random.randint(0, 9999999):07}",
+            approver_email=f"guardian.{user.username}@example.com",
+            approval_token=str(self._uuid()) if state == "pending" else "",
+            approval_notification_timestamp=None
+            if state == "unnotified"
+            else signed_up,
+            approved_time=signed_up + timedelta(days=1)
+            if state == "approved"
+            else None,
+            photo_usage_approved=self.random.random() < 0.5,
+        )
+
+    def _contact_person(self, profile):
+        return AdditionalContactPerson(
+            youth_profile=profile,
+            first_name=self.random.choice(FIRST_NAMES),
+            last_name=self.random.choice(LAST_NAMES),
+            phone=f"050{self.random.randint(0, 9999999):07}",
+            email=f"contact.{profile.membership_number}@example.com",
+        )
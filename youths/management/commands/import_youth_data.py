@@ -1,68 +1,144 @@
-import json
+import time
 
 from django.contrib.auth import get_user_model
-from django.core import serializers
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from django.db.models.signals import post_save
 from helusers.models import ADGroup, ADGroupMapping
-from sequences.models import Sequence
 
+from youths.importer import (
+    IncrementalYouthDataImporter,
+    ParallelYouthDataImporter,
+    read_records,
+    YouthDataImporter,
+)
 from youths.models import YouthProfile
-from youths.signals import generate_membership_number
 from youths.utils import generate_admin_group
 
 User = get_user_model()
 
 
 class Command(BaseCommand):
-    help = "Import youth data from a JSON file created using the open-city-profile backend's export_youth_data command."
+    help = "Import youth data from JSON files created using the open-city-profile backend's export_youth_data command."
 
     def add_arguments(self, parser):
         parser.add_argument("filename", nargs="+", type=str)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of objects to create with one query",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of worker processes creating users, youth profiles and "
+                "contact persons. With more than one worker the import is not atomic."
+            ),
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "Create, update and delete only the objects which differ from the "
+                "file instead of replacing all data"
+            ),
+        )
 
     def handle(self, *args, **kwargs):
-        filename = kwargs["filename"][0]
-        with open(filename, "r") as infile:
-            data = json.load(infile)
-
-        post_save.disconnect(generate_membership_number, sender=YouthProfile)
-
-        with transaction.atomic():
-            YouthProfile.objects.all().delete()
-            User.objects.exclude(is_superuser=True).delete()
-            ADGroup.objects.all().delete()
-
-            User.objects.get_by_natural_key = lambda uuid: User.objects.get(uuid=uuid)
-            ADGroup.objects.get_by_natural_key = lambda name: ADGroup.objects.get(
-                name=name
+        filenames = kwargs["filename"]
+        self._started = time.perf_counter()
+        self._imported = 0
+
+        if kwargs["incremental"]:
+            if kwargs["workers"] > 1:
+                raise CommandError("Incremental imports can't use workers.")
+            self._import_incrementally(filenames, kwargs["chunk_size"])
+            return
+
+        if kwargs["workers"] > 1:
+            importer = ParallelYouthDataImporter(
+                kwargs["workers"], kwargs["chunk_size"], progress=self._stage_progress
             )
-            YouthProfile.objects.get_by_natural_key = (
-                lambda uuid: YouthProfile.objects.get(id=uuid)
-            )
-
-            max_membership_number = 0
-            for obj in serializers.deserialize("json", json.dumps(data)):
-                obj.save()
-
-                if obj.object.__class__ == YouthProfile:
-                    membership_number = int(obj.object.membership_number.lstrip("0"))
-                    if membership_number > max_membership_number:
-                        max_membership_number = membership_number
-
-            Sequence.objects.filter(name="membership_number").update(
-                last=max_membership_number
+            with transaction.atomic():
+                self._delete_existing_data()
+            counts = self._import(importer, filenames, filenames)
+            with transaction.atomic():
+                self._reconcile(importer.max_membership_number)
+            for name, (count, duration) in importer.stages.items():
+                self.stdout.write(
+                    f"Stage {name}: {count} created in {duration:.1f} s "
+                    f"({count / duration if duration else 0:.0f}/s)"
+                )
+        else:
+            importer = YouthDataImporter(kwargs["chunk_size"], progress=self._progress)
+            with transaction.atomic():
+                self._delete_existing_data()
+                counts = self._import(importer, read_records(filenames), filenames)
+                self._reconcile(importer.max_membership_number)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully read {counts.get(User, 0)} users and "
+                f"{counts.get(YouthProfile, 0)} youth profiles from "
+                f"{', '.join(filenames)}"
             )
+        )
 
-            YouthProfile.objects.update(approval_token="")
-
-            admin_group = generate_admin_group()
-            for ad_group in ADGroup.objects.all():
-                ADGroupMapping.objects.create(group=admin_group, ad_group=ad_group)
+    def _import_incrementally(self, filenames, chunk_size):
+        importer = IncrementalYouthDataImporter(
+            chunk_size, progress=self._sync_progress
+        )
+        with transaction.atomic():
+            changes = self._import(importer, read_records(filenames), filenames)
+            self._reconcile(importer.max_membership_number)
 
+        for model, model_changes in changes.items():
             self.stdout.write(
-                self.style.SUCCESS(
-                    f"Successfully read {get_user_model().objects.count()} users and "
-                    f"{YouthProfile.objects.count()} from {filename}"
+                f"{model._meta.verbose_name_plural.capitalize()}: "
+                + ", ".join(
+                    f"{count} {change}" for change, count in model_changes.items()
                 )
             )
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully synchronized {', '.join(filenames)}")
+        )
+
+    def _delete_existing_data(self):
+        YouthProfile.objects.all().delete()
+        User.objects.exclude(is_superuser=True).delete()
+        ADGroup.objects.all().delete()
+
+    def _import(self, importer, source, filenames):
+        try:
+            return importer.run(source)
+        except ValueError as e:
+            raise CommandError(f"Invalid data in {', '.join(filenames)}: {e}")
+
+    def _reconcile(self, max_membership_number):
+        """Continue the membership numbers and map the AD groups to the staff group."""
+        if max_membership_number:
+            YouthProfile.membership_number_sequence.set_last_value(
+                max_membership_number
+            )
+
+        admin_group = generate_admin_group()
+        ADGroupMapping.objects.bulk_create(
+            ADGroupMapping(group=admin_group, ad_group=ad_group)
+            for ad_group in ADGroup.objects.exclude(groups__group=admin_group)
+        )
+
+    def _progress(self, model, count):
+        self._stage_progress(model._meta.verbose_name_plural, count)
+
+    def _stage_progress(self, name, count, action="Created"):
+        self._imported += count
+        elapsed = time.perf_counter() - self._started
+        self.stdout.write(
+            f"{action} {count} {name}, "
+            f"{self._imported} objects in total ({self._imported / elapsed:.0f}/s)"
+        )
+
+    def _sync_progress(self, model, count):
+        self._stage_progress(model._meta.verbose_name_plural, count, "Synchronized")
@@ -0,0 +1,92 @@
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from youths.models import calculate_expiration, SeasonRenewal
+from youths.renewal import renew_chunk, renewal_candidates
+
+
+def season_end(year):
+    expiration_day, expiration_month = settings.YOUTH_MEMBERSHIP_SEASON_END_DATE
+    return date(year, expiration_month, expiration_day)
+
+
+class Command(BaseCommand):
+    help = (
+        "Renew the approved memberships of adults expiring at a season's end. "
+        "Minors renew their memberships themselves, as the renewals need their "
+        "guardian's approval. An interrupted renewal continues when the command is "
+        "run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--expiring-on",
+            type=date.fromisoformat,
+            default=season_end(date.today().year),
+            help="Season end date of the memberships to renew, YYYY-MM-DD",
+        )
+        parser.add_argument(
+            "--new-expiration",
+            type=date.fromisoformat,
+            default=calculate_expiration(date.today()),
+            help="Expiration date of the renewed memberships, YYYY-MM-DD",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many memberships would be renewed",
+        )
+
+    def handle(self, *args, **kwargs):
+        expiring_on = kwargs["expiring_on"]
+        new_expiration = kwargs["new_expiration"]
+        if new_expiration <= expiring_on:
+            raise CommandError(
+                f"Memberships expiring on {expiring_on} are not yet in the renewal "
+                f"window, the new expiration would be {new_expiration}."
+            )
+
+        if kwargs["dry_run"]:
+            count = renewal_candidates(expiring_on).count()
+            self.stdout.write(f"{count} memberships expiring on {expiring_on}")
+            return
+
+        season_renewal, created = SeasonRenewal.objects.get_or_create(
+            expiring_on=expiring_on, defaults={"new_expiration": new_expiration}
+        )
+        if season_renewal.new_expiration != new_expiration:
+            raise CommandError(
+                f"Memberships expiring on {expiring_on} are already being renewed "
+                f"until {season_renewal.new_expiration}."
+            )
+        if not created:
+            self.stdout.write(
+                f"Continuing the renewal started at {season_renewal.started_at}"
+            )
+
+        started = time.perf_counter()
+        renewed = 0
+        while True:
+            result = renew_chunk(season_renewal, kwargs["chunk_size"])
+            if result is None:
+                break
+            renewed += result
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Renewed {result} memberships, "
+                f"{renewed} in total ({renewed / elapsed:.0f}/s)"
+            )
+
+        season_renewal.refresh_from_db()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Renewed {renewed} memberships in {elapsed:.1f} s "
+                f"({renewed / elapsed if elapsed else 0:.0f}/s), "
+                f"{season_renewal.renewed} in the whole renewal."
+            )
+        )
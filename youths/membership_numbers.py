@@ -0,0 +1,74 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+
+class MembershipNumberSequence:
+    """Source of integer values for membership numbers, reserved in blocks per process.
+
+    Values come from a PostgreSQL sequence. Reserving them never waits for other
+    transactions, unlike a sequence table row which stays locked until the reserving
+    transaction ends. Each process reserves YOUTH_MEMBERSHIP_NUMBER_BLOCK_SIZE values
+    with a single query and hands them out from memory.
+
+    Numbering guarantees:
+
+    - Values are unique across all processes.
+    - Values handed out by a single process are increasing.
+    - Values are not ordered across processes, a profile created later can get a
+      smaller number than a profile created earlier by another process.
+    - There are gaps. Values used by rolled back transactions are not reused, neither
+      are the values left in a block when a process exits.
+    """
+
+    def __init__(self, sequence_name):
+        self.sequence_name = sequence_name
+        self._lock = threading.Lock()
+        self._values = []
+        self._last_value = None
+        self._pid = None
+
+    def get_next_value(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Values reserved before forking would be handed out by every child
+                self._values = []
+                self._pid = os.getpid()
+            if not self._values:
+                self._values = self._reserve(
+                    settings.YOUTH_MEMBERSHIP_NUMBER_BLOCK_SIZE
+                )
+            self._last_value = self._values.pop(0)
+            return self._last_value
+
+    def get_values(self, count):
+        """Reserve count values with one query, for creating profiles in bulk."""
+        return self._reserve(count)
+
+    def get_last_value(self):
+        """Return the last value handed out by this process."""
+        return self._last_value
+
+    def set_last_value(self, value):
+        """Continue the sequence after the given value.
+
+        The sequence is never moved back, so values already handed out, or reserved
+        by other processes, are not handed out again.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT setval(%s, GREATEST(nextval(%s), %s), false)",
+                [self.sequence_name, self.sequence_name, value + 1],
+            )
+        with self._lock:
+            self._values = []
+
+    def _reserve(self, count):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                [self.sequence_name, count],
+            )
+            return sorted(value for value, in cursor.fetchall())
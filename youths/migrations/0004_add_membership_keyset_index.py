@@ -0,0 +1,19 @@
+# Generated by Django 2.2.18 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("youths", "0003_no_default_approval_token"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="youthprofile",
+            index=models.Index(
+                fields=["membership_number", "id"], name="youths_membership_keyset_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.18 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("youths", "0004_add_membership_keyset_index"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="youthprofile",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(_negated=True, approval_token=""),
+                fields=("approval_token",),
+                name="youths_unique_approval_token",
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.18 on 2026-10-19 11:20
+
+from django.db import migrations
+
+# Expressions match the SQL Django generates for icontains lookups
+SEARCH_FIELDS = ("membership_number", "school_name", "school_class")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("youths", "0005_unique_approval_token"),
+    ]
+
+    operations = [
+        # Shared by both apps' indexes, so it's not dropped when migrating backwards
+        migrations.RunSQL(
+            sql="CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            reverse_sql=migrations.RunSQL.noop,
+        )
+    ] + [
+        migrations.RunSQL(
+            sql=(
+                f"CREATE INDEX youths_{field}_trgm_idx ON youths_youthprofile "
+                f"USING gin (UPPER({field}::text) gin_trgm_ops);"
+            ),
+            reverse_sql=f"DROP INDEX youths_{field}_trgm_idx;",
+        )
+        for field in SEARCH_FIELDS
+    ]
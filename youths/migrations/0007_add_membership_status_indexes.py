@@ -0,0 +1,28 @@
+# Generated by Django 2.2.18 on 2026-10-19 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("youths", "0006_add_search_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="youthprofile",
+            index=models.Index(
+                condition=models.Q(approved_time__isnull=True),
+                fields=["expiration"],
+                name="youths_pending_approval_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="youthprofile",
+            index=models.Index(
+                fields=["approved_time", "expiration"],
+                name="youths_approved_expiration_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.18 on 2026-10-19 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("youths", "0007_add_membership_status_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="youthprofile",
+            index=models.Index(fields=["expiration"], name="youths_expiration_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="youthprofile",
+            index=models.Index(fields=["birth_date"], name="youths_birth_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="youthprofile",
+            index=models.Index(
+                fields=["language_at_home", "expiration"],
+                name="youths_language_expiration_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="youthprofile",
+            index=models.Index(
+                condition=models.Q(approved_time__isnull=True),
+                fields=["approval_notification_timestamp"],
+                name="youths_unapproved_notified_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.18 on 2026-10-19 14:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sequences", "0001_initial"),
+        ("youths", "0008_add_work_queue_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                "CREATE SEQUENCE youths_membership_number_seq;",
+                # Continue from the last number given by the sequences table
+                "SELECT setval('youths_membership_number_seq', COALESCE("
+                "(SELECT last FROM sequences_sequence WHERE name = 'membership_number'), 0"
+                ") + 1, false);",
+            ],
+            reverse_sql="DROP SEQUENCE youths_membership_number_seq;",
+        ),
+    ]
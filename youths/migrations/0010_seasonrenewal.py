@@ -0,0 +1,34 @@
+# Generated by Django 2.2.18 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("youths", "0009_membership_number_sequence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SeasonRenewal",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("expiring_on", models.DateField(unique=True)),
+                ("new_expiration", models.DateField()),
+                ("renewed_adults", models.PositiveIntegerField(default=0)),
+                ("renewed_minors", models.PositiveIntegerField(default=0)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("checkpoint_at", models.DateTimeField(auto_now=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
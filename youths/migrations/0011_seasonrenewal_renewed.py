@@ -0,0 +1,22 @@
+# Generated by Django 2.2.18 on 2026-10-20 09:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("youths", "0010_seasonrenewal"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="seasonrenewal",
+            old_name="renewed_adults",
+            new_name="renewed",
+        ),
+        migrations.RemoveField(
+            model_name="seasonrenewal",
+            name="renewed_minors",
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.18 on 2026-10-20 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("youths", "0011_seasonrenewal_renewed"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="youthprofile",
+            name="youths_approved_expiration_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="youthprofile",
+            name="youths_expiration_idx",
+        ),
+        migrations.AddIndex(
+            model_name="youthprofile",
+            index=models.Index(
+                fields=["expiration", "approved_time"],
+                name="youths_expiration_approved_idx",
+            ),
+        ),
+    ]
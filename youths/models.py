@@ -1,20 +1,22 @@
 import uuid
-from datetime import date
+from datetime import date, datetime
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Case, Func, Q, Value, When
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
-from django_ilmoitin.utils import send_notification
 from enumfields import EnumField
 from helsinki_gdpr.models import SerializableMixin
-from sequences import Sequence
 
 from common_utils.audit_logging import AuditLogModel
-from common_utils.models import UUIDModel
+from common_utils.models import UUIDModel, ValidateOnSaveModel
+from common_utils.notifications import send_notification
 
 from .enums import MembershipStatus, NotificationType
 from .enums import YouthLanguage as LanguageAtHome
+from .membership_numbers import MembershipNumberSequence
 
 
 def calculate_expiration(from_date=None):
@@ -34,11 +36,166 @@ def calculate_expiration(from_date=None):
     return date(year=expiration_year, month=expiration_month, day=expiration_day)
 
 
-class YouthProfile(AuditLogModel, UUIDModel, SerializableMixin):
+class SeasonExpiration(Func):
+    """Database version of calculate_expiration() for a timestamp expression."""
+
+    output_field = models.DateField()
+    template = (
+        "MAKE_DATE("
+        "EXTRACT(YEAR FROM %(expressions)s AT TIME ZONE 'UTC')::integer + "
+        "(EXTRACT(MONTH FROM %(expressions)s AT TIME ZONE 'UTC') >= %(start_month)d)::integer, "
+        "%(month)d, %(day)d)"
+    )
+
+    def __init__(self, expression, **extra):
+        expiration_day, expiration_month = settings.YOUTH_MEMBERSHIP_SEASON_END_DATE
+        super().__init__(
+            expression,
+            start_month=settings.YOUTH_MEMBERSHIP_FULL_SEASON_START_MONTH,
+            month=expiration_month,
+            day=expiration_day,
+            **extra,
+        )
+
+
+def membership_status_conditions(today):
+    """Conditions matching each value of YouthProfile.membership_status on the given day.
+
+    Approved periods can only have ended before today if they were approved before the
+    full season start preceding the current season's end, which allows comparing the
+    approved time directly instead of its calculated expiration.
+    """
+    expiration_day, expiration_month = settings.YOUTH_MEMBERSHIP_SEASON_END_DATE
+    season_end_year = today.year
+    if today > date(today.year, expiration_month, expiration_day):
+        season_end_year += 1
+    approved_period_start = datetime(
+        season_end_year - 1,
+        settings.YOUTH_MEMBERSHIP_FULL_SEASON_START_MONTH,
+        1,
+        tzinfo=timezone.utc,
+    )
+    approved_period_expiration = SeasonExpiration("approved_time")
+
+    valid = Q(expiration__gte=today)
+    return {
+        MembershipStatus.EXPIRED: Q(expiration__lt=today),
+        MembershipStatus.PENDING: valid
+        & (Q(approved_time__isnull=True) | Q(approved_time__lt=approved_period_start)),
+        MembershipStatus.RENEWING: valid
+        & Q(
+            approved_time__gte=approved_period_start,
+            expiration__gt=approved_period_expiration,
+        ),
+        MembershipStatus.ACTIVE: valid
+        & Q(
+            approved_time__gte=approved_period_start,
+            expiration__lte=approved_period_expiration,
+        ),
+    }
+
+
+# Order of the membership statuses when ordering by status, from the ones needing
+# attention to the expired ones
+MEMBERSHIP_STATUS_ORDER = (
+    MembershipStatus.PENDING,
+    MembershipStatus.RENEWING,
+    MembershipStatus.ACTIVE,
+    MembershipStatus.EXPIRED,
+)
+
+
+def renewable_condition(today):
+    """Condition matching YouthProfile.renewable on the given day."""
+    return Q(expiration__lt=today) | (
+        Q(approved_time__isnull=False) & ~Q(expiration=calculate_expiration(today))
+    )
+
+
+class YouthProfileQuerySet(models.QuerySet):
+    def by_approval_token(self, token):
+        """Get the youth profile with the given non-empty approval token.
+
+        Uses the partial unique index on the approval token.
+        """
+        return self.exclude(approval_token="").get(approval_token=token)
+
+    def with_membership_status(self):
+        """Annotate the membership status and renewability computed in the database.
+
+        computed_membership_status holds the MembershipStatus value and
+        computed_renewable the boolean matching the respective model properties.
+        """
+        today = date.today()
+        return self.annotate(
+            computed_membership_status=Case(
+                *[
+                    When(condition, then=Value(status.value))
+                    for status, condition in membership_status_conditions(today).items()
+                ],
+                output_field=models.CharField(),
+            ),
+            computed_renewable=Case(
+                When(renewable_condition(today), then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            ),
+        )
+
+    def with_membership_status_rank(self):
+        """Annotate the index of the status in MEMBERSHIP_STATUS_ORDER."""
+        conditions = membership_status_conditions(date.today())
+        return self.annotate(
+            membership_status_rank=Case(
+                *[
+                    When(conditions[status], then=Value(rank))
+                    for rank, status in enumerate(MEMBERSHIP_STATUS_ORDER)
+                ],
+                output_field=models.IntegerField(),
+            )
+        )
+
+    def filter_membership_status(self, status):
+        return self.filter(membership_status_conditions(date.today())[status])
+
+    def filter_renewable(self, renewable=True):
+        condition = renewable_condition(date.today())
+        return self.filter(condition if renewable else ~condition)
+
+    def search(self, term):
+        """Filter youth profiles containing the term in their own or their user's fields.
+
+        Profile and user matches are combined with a union so that both tables can be
+        searched with their trigram indexes, an OR across the join would scan them.
+        """
+        user_model = self.model._meta.get_field("user").related_model
+        matching_users = user_model.objects.filter(
+            Q(first_name__icontains=term)
+            | Q(last_name__icontains=term)
+            | Q(email__icontains=term)
+        ).values("pk")
+        by_profile = self.model.objects.filter(
+            Q(membership_number__icontains=term)
+            | Q(school_name__icontains=term)
+            | Q(school_class__icontains=term)
+        ).values("pk")
+        by_user = self.model.objects.filter(user__in=matching_users).values("pk")
+
+        by_profile_sql, by_profile_params = by_profile.query.sql_with_params()
+        by_user_sql, by_user_params = by_user.query.sql_with_params()
+        return self.filter(
+            pk__in=RawSQL(
+                f"{by_profile_sql} UNION {by_user_sql}",
+                by_profile_params + by_user_params,
+            )
+        )
+
+
+class YouthProfile(AuditLogModel, UUIDModel, ValidateOnSaveModel, SerializableMixin):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE
     )
-    # Post-save signal generates the membership number
+    # Generated when the profile is first saved
     membership_number = models.CharField(
         max_length=16, blank=True, help_text=_("Youth's membership number")
     )
@@ -73,7 +230,49 @@ class YouthProfile(AuditLogModel, UUIDModel, SerializableMixin):
     profile_access_token_expiration = models.DateTimeField(null=True, blank=True)
 
     # Source sequence of integer values for a membership number.
-    membership_number_sequence = Sequence("membership_number")
+    membership_number_sequence = MembershipNumberSequence(
+        "youths_membership_number_seq"
+    )
+
+    objects = YouthProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Supports keyset pagination of youth profiles
+            models.Index(
+                fields=["membership_number", "id"], name="youths_membership_keyset_idx"
+            ),
+            # Supports finding memberships waiting for approval
+            models.Index(
+                fields=["expiration"],
+                name="youths_pending_approval_idx",
+                condition=Q(approved_time__isnull=True),
+            ),
+            # Supports the membership status filters and expiration ranges
+            models.Index(
+                fields=["expiration", "approved_time"],
+                name="youths_expiration_approved_idx",
+            ),
+            # Support the staff work queue filters
+            models.Index(fields=["birth_date"], name="youths_birth_date_idx"),
+            models.Index(
+                fields=["language_at_home", "expiration"],
+                name="youths_language_expiration_idx",
+            ),
+            models.Index(
+                fields=["approval_notification_timestamp"],
+                name="youths_unapproved_notified_idx",
+                condition=Q(approved_time__isnull=True),
+            ),
+        ]
+        constraints = [
+            # Approval tokens are looked up by guardians, only set tokens are indexed
+            models.UniqueConstraint(
+                fields=["approval_token"],
+                condition=~Q(approval_token=""),
+                name="youths_unique_approval_token",
+            ),
+        ]
 
     def make_approvable(self, youth_name: str):
         self.approval_token = uuid.uuid4()
@@ -148,7 +347,15 @@ class YouthProfile(AuditLogModel, UUIDModel, SerializableMixin):
             return str(self.pk)
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        if self._state.adding or not self.membership_number:
+            self.membership_number = str(
+                self.membership_number_sequence.get_next_value()
+            ).zfill(settings.YOUTH_MEMBERSHIP_NUMBER_LENGTH)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {
+                    *kwargs["update_fields"],
+                    "membership_number",
+                }
         return super().save(*args, **kwargs)
 
     serialize_fields = (
@@ -166,7 +373,7 @@ class YouthProfile(AuditLogModel, UUIDModel, SerializableMixin):
     )
 
 
-class AdditionalContactPerson(SerializableMixin):
+class AdditionalContactPerson(ValidateOnSaveModel, SerializableMixin):
     youth_profile = models.ForeignKey(
         YouthProfile,
         on_delete=models.CASCADE,
@@ -187,6 +394,16 @@ class AdditionalContactPerson(SerializableMixin):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.pk})"
 
-    def save(self, *args, **kwargs):
-        self.full_clean()
-        return super().save(*args, **kwargs)
+
+class SeasonRenewal(models.Model):
+    """Progress of the batch renewal of memberships expiring at a season's end."""
+
+    expiring_on = models.DateField(unique=True)
+    new_expiration = models.DateField()
+    renewed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    checkpoint_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.expiring_on} -> {self.new_expiration}"
@@ -0,0 +1,78 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from common_utils.audit_logging import log_bulk
+
+from .cache import invalidate_my_youth_profiles
+from .models import SeasonRenewal, YouthProfile
+
+
+def latest_adult_birth_date(today):
+    """Return the latest birth date of youths who are adults on the given day."""
+    try:
+        return today.replace(year=today.year - 18)
+    except ValueError:
+        # Born on the 29th of February, the 28th is the latest day
+        return date(today.year - 18, 2, 28)
+
+
+def renewal_candidates(expiring_on):
+    """Approved memberships of adults expiring on the given season end date.
+
+    Minors are left out, as their renewals need their guardian's approval. The
+    approval links need a temporary Helsinki profile access token, which can only
+    be created with the youth's own API token, so minors renew their memberships
+    themselves with renewMyYouthProfile.
+    """
+    return YouthProfile.objects.filter(
+        expiration=expiring_on,
+        approved_time__isnull=False,
+        birth_date__lte=latest_adult_birth_date(date.today()),
+    )
+
+
+def renew_chunk(season_renewal, chunk_size):
+    """Renew the next chunk of memberships of the season renewal.
+
+    The memberships are renewed and approved with a single UPDATE. The chunk is
+    written and the renewal checkpointed in one transaction, and renewed profiles no
+    longer expire on the renewed date, so an interrupted renewal continues from
+    where it was left off.
+
+    Return the number of renewed memberships, or None when all are renewed.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        chunk = list(
+            renewal_candidates(season_renewal.expiring_on)
+            .select_for_update(skip_locked=True)
+            .values_list("pk", "user_id")[:chunk_size]
+        )
+        if not chunk:
+            # Other workers may still be renewing the locked profiles
+            if not renewal_candidates(season_renewal.expiring_on).exists():
+                season_renewal.finished_at = now
+                season_renewal.save(update_fields=["finished_at", "checkpoint_at"])
+            return None
+        profile_ids = [profile_id for profile_id, user_id in chunk]
+
+        renewed = YouthProfile.objects.filter(pk__in=profile_ids).update(
+            expiration=season_renewal.new_expiration,
+            approved_time=now,
+            approval_token="",
+            profile_access_token="",
+            profile_access_token_expiration=None,
+        )
+
+        SeasonRenewal.objects.filter(pk=season_renewal.pk).update(
+            renewed=F("renewed") + renewed, checkpoint_at=now
+        )
+
+        log_bulk("UPDATE", YouthProfile.__name__, profile_ids)
+        invalidate_my_youth_profiles(user_id for profile_id, user_id in chunk)
+
+    return renewed
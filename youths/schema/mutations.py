@@ -4,7 +4,6 @@ import graphene
 from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
-from django_ilmoitin.utils import send_notification
 from graphene import relay
 from graphql import GraphQLError
 from graphql_jwt.decorators import login_required
@@ -15,6 +14,7 @@ from common_utils.exceptions import (
     ProfileHasNoPrimaryEmailError,
     TokenExpiredError,
 )
+from common_utils.notifications import send_notification
 from common_utils.profile import ProfileAPI
 
 from ..decorators import staff_required
@@ -383,7 +383,7 @@ class ApproveYouthProfileMutation(relay.ClientIDMutation):
         token = input.get("approval_token")
         if not token:
             raise GraphQLError("Approval token cannot be empty.")
-        youth_profile = YouthProfile.objects.get(approval_token=token)
+        youth_profile = YouthProfile.objects.by_approval_token(token)
         if (
             not youth_profile.profile_access_token
             or youth_profile.profile_access_token_expiration < timezone.now()
@@ -1,7 +1,9 @@
 import graphene
-from graphene_django.filter import DjangoFilterConnectionField
 from graphql_jwt.decorators import login_required
 
+from common_utils.graphql import KeysetDjangoFilterConnectionField
+
+from ..cache import get_my_youth_profile
 from ..decorators import staff_required
 from ..models import YouthProfile
 from .types import YouthProfileNode
@@ -21,10 +23,13 @@ class Query(graphene.ObjectType):
         "error codes:\n\n* `TODO`",
     )
     # TODO: Add the complete list of error codes
-    youth_profiles = DjangoFilterConnectionField(
+    youth_profiles = KeysetDjangoFilterConnectionField(
         YouthProfileNode,
+        keyset_fields=("membership_number", "id"),
         description="Search for profiles. The results are filtered based on the given parameters. The results are "
-        "paged using Relay.\n\nRequires `staff` credentials for the service given in "
+        "paged using Relay. With `keyset: true` the results are ordered by membership number and paged using "
+        "keyset cursors, which keeps deep pages as fast as the first one.\n\nRequires `staff` credentials for the "
+        "service given in "
         "`serviceType`. The profiles must have an active connection to the given `serviceType`, otherwise "
         "they will not be returned.\n\nPossible error codes:\n\n* `TODO`",
     )
@@ -37,7 +42,7 @@ class Query(graphene.ObjectType):
 
     @login_required
     def resolve_my_youth_profile(self, info, **kwargs):
-        return YouthProfile.objects.filter(user=info.context.user).first()
+        return get_my_youth_profile(info.context.user)
 
     @staff_required
     def resolve_youth_profiles(self, info, **kwargs):
@@ -46,5 +51,5 @@ class Query(graphene.ObjectType):
     def resolve_youth_profile_by_approval_token(self, info, **kwargs):
         approval_token = kwargs.get("token")
         if approval_token:
-            return YouthProfile.objects.get(approval_token=kwargs.get("token"))
+            return YouthProfile.objects.by_approval_token(approval_token)
         return None
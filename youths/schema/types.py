@@ -38,12 +38,75 @@ class AdditionalContactPersonNode(DjangoObjectType):
         interfaces = (relay.Node,)
 
 
+class ProfileOrderingFilter(django_filters.OrderingFilter):
+    """Ordering filter which can also order by the computed membership status.
+
+    The statuses are ordered by MEMBERSHIP_STATUS_ORDER, pending ones first.
+    """
+
+    def filter(self, qs, value):
+        if value and any(param.lstrip("-") == "membershipStatus" for param in value):
+            qs = qs.with_membership_status_rank()
+        return super().filter(qs, value)
+
+
 class ProfileFilter(django_filters.FilterSet):
     class Meta:
         model = YouthProfile
         fields = ("membership_number",)
 
     membership_number = django_filters.CharFilter(lookup_expr="icontains")
+    expiration_from = django_filters.DateFilter(
+        field_name="expiration", lookup_expr="gte"
+    )
+    expiration_to = django_filters.DateFilter(
+        field_name="expiration", lookup_expr="lte"
+    )
+    birth_date_from = django_filters.DateFilter(
+        field_name="birth_date", lookup_expr="gte"
+    )
+    birth_date_to = django_filters.DateFilter(
+        field_name="birth_date", lookup_expr="lte"
+    )
+    language_at_home = django_filters.ChoiceFilter(
+        choices=[(language.name, language.label) for language in YouthLanguage],
+        method="filter_language_at_home",
+    )
+    school_name = django_filters.CharFilter(lookup_expr="icontains")
+    approved = django_filters.BooleanFilter(
+        field_name="approved_time", lookup_expr="isnull", exclude=True
+    )
+    approval_notification_before = django_filters.DateTimeFilter(
+        field_name="approval_notification_timestamp", lookup_expr="lt"
+    )
+    search = django_filters.CharFilter(method="filter_search")
+    membership_status = django_filters.ChoiceFilter(
+        choices=[(status.name, status.label) for status in MembershipStatus],
+        method="filter_membership_status",
+    )
+    renewable = django_filters.BooleanFilter(method="filter_renewable")
+    order_by = ProfileOrderingFilter(
+        fields=(
+            ("membership_number", "membershipNumber"),
+            ("birth_date", "birthDate"),
+            ("expiration", "expiration"),
+            ("approved_time", "approvedTime"),
+            ("approval_notification_timestamp", "approvalNotificationTimestamp"),
+            ("membership_status_rank", "membershipStatus"),
+        )
+    )
+
+    def filter_language_at_home(self, queryset, name, value):
+        return queryset.filter(language_at_home=YouthLanguage[value])
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+    def filter_membership_status(self, queryset, name, value):
+        return queryset.filter_membership_status(MembershipStatus[value])
+
+    def filter_renewable(self, queryset, name, value):
+        return queryset.filter_renewable(value)
 
 
 class YouthProfileNode(DjangoObjectType):
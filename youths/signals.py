@@ -1,24 +1,49 @@
-from django.conf import settings
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from youths.models import YouthProfile
+from youths.cache import invalidate_my_youth_profile
+from youths.models import AdditionalContactPerson, YouthProfile
+from youths.utils import invalidate_user_in_staff_group
+
+User = get_user_model()
 
 
 @receiver(post_save, sender=YouthProfile)
-def generate_membership_number(sender, instance: YouthProfile, created, **kwargs):
-    """Generate a membership number for a youth profile.
+@receiver(post_delete, sender=YouthProfile)
+def invalidate_cached_youth_profile(sender, instance: YouthProfile, **kwargs):
+    invalidate_my_youth_profile(instance.user_id)
 
-    Membership number is only generated for a new profile or a profile
-    missing a membership number.
-    """
-    if created or not instance.membership_number:
 
-        membership_number_raw = YouthProfile.membership_number_sequence.get_next_value()
-        membership_number = str(membership_number_raw).zfill(
-            settings.YOUTH_MEMBERSHIP_NUMBER_LENGTH
-        )
-        instance.membership_number = membership_number
-        sender.objects.filter(pk=instance.pk).update(
-            membership_number=membership_number
+@receiver(post_save, sender=AdditionalContactPerson)
+@receiver(post_delete, sender=AdditionalContactPerson)
+def invalidate_cached_contact_person_youth_profile(
+    sender, instance: AdditionalContactPerson, **kwargs
+):
+    if AdditionalContactPerson.youth_profile.is_cached(instance):
+        user_id = instance.youth_profile.user_id
+    else:
+        # Avoid loading the youth profile instance, which would be audit logged
+        user_id = (
+            YouthProfile.objects.filter(pk=instance.youth_profile_id)
+            .values_list("user_id", flat=True)
+            .first()
         )
+    invalidate_my_youth_profile(user_id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_cached_staff_group_membership(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """Invalidate the cached staff group memberships of the users whose groups change."""
+    if reverse:
+        # The groups of users were changed via the group
+        if action == "pre_clear":
+            invalidate_user_in_staff_group(
+                instance.user_set.values_list("pk", flat=True)
+            )
+        elif action in ("post_add", "post_remove"):
+            invalidate_user_in_staff_group(pk_set)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        invalidate_user_in_staff_group([instance.pk], user=instance)
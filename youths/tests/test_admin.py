@@ -0,0 +1,31 @@
+from django.contrib.admin.sites import AdminSite
+
+from youths.admin import YouthProfileAdmin
+from youths.models import YouthProfile
+from youths.tests.factories import YouthProfileFactory
+
+
+def test_admin_search_uses_indexed_search(rf):
+    youth_profile = YouthProfileFactory(school_name="Kallion lukio")
+    YouthProfileFactory(school_name="Ressun lukio")
+    admin = YouthProfileAdmin(YouthProfile, AdminSite())
+
+    results, _ = admin.get_search_results(
+        rf.get("/"), YouthProfile.objects.all(), "kallion"
+    )
+
+    assert list(results) == [youth_profile]
+
+
+def test_admin_search_includes_other_search_fields(rf):
+    by_school = YouthProfileFactory(school_name="Kallion lukio")
+    by_approver = YouthProfileFactory(approver_email="kallion.vanhempi@example.com")
+    YouthProfileFactory(school_name="Ressun lukio")
+    admin = YouthProfileAdmin(YouthProfile, AdminSite())
+    admin.search_fields = admin.search_fields + ("approver_email",)
+
+    results, _ = admin.get_search_results(
+        rf.get("/"), YouthProfile.objects.all(), "kallion"
+    )
+
+    assert set(results) == {by_school, by_approver}
@@ -0,0 +1,122 @@
+import json
+import logging
+
+from youths import cache
+from youths.cache import get_my_youth_profile, get_my_youth_profile_cache_stats
+from youths.tests.factories import AdditionalContactPersonFactory, YouthProfileFactory
+
+MY_YOUTH_PROFILE_QUERY = """
+    {
+        myYouthProfile {
+            schoolName
+            additionalContactPersons {
+                edges {
+                    node {
+                        firstName
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+def test_my_youth_profile_is_served_from_cache(
+    rf, user_gql_client, django_assert_num_queries
+):
+    request = rf.post("/graphql")
+    request.user = user_gql_client.user
+    youth_profile = YouthProfileFactory(user=user_gql_client.user)
+    acp = AdditionalContactPersonFactory(youth_profile=youth_profile)
+    expected_data = {
+        "myYouthProfile": {
+            "schoolName": youth_profile.school_name,
+            "additionalContactPersons": {
+                "edges": [{"node": {"firstName": acp.first_name}}]
+            },
+        }
+    }
+
+    executed = user_gql_client.execute(MY_YOUTH_PROFILE_QUERY, context=request)
+    assert executed["data"] == expected_data
+
+    with django_assert_num_queries(0):
+        executed = user_gql_client.execute(MY_YOUTH_PROFILE_QUERY, context=request)
+    assert executed["data"] == expected_data
+    assert get_my_youth_profile_cache_stats() == {
+        "hits": 1,
+        "misses": 1,
+        "hit_rate": 0.5,
+    }
+
+
+def test_cached_youth_profile_is_invalidated_when_profile_changes(user):
+    youth_profile = YouthProfileFactory(user=user)
+    get_my_youth_profile(user)
+
+    youth_profile.school_name = "Changed school"
+    youth_profile.save()
+
+    assert get_my_youth_profile(user).school_name == "Changed school"
+
+
+def test_cached_youth_profile_is_invalidated_when_contact_persons_change(user):
+    youth_profile = YouthProfileFactory(user=user)
+    assert list(get_my_youth_profile(user).additional_contact_persons.all()) == []
+
+    acp = AdditionalContactPersonFactory(youth_profile=youth_profile)
+    assert list(get_my_youth_profile(user).additional_contact_persons.all()) == [acp]
+
+    acp.delete()
+    assert list(get_my_youth_profile(user).additional_contact_persons.all()) == []
+
+
+def test_cached_youth_profile_is_invalidated_when_profile_is_deleted(user):
+    youth_profile = YouthProfileFactory(user=user)
+    get_my_youth_profile(user)
+
+    youth_profile.delete()
+
+    assert get_my_youth_profile(user) is None
+
+
+def test_profile_loaded_before_a_change_is_not_served_after_it(user, mocker):
+    youth_profile = YouthProfileFactory(user=user)
+    load_my_youth_profile = cache._load_my_youth_profile
+
+    def load_and_change(user):
+        loaded = load_my_youth_profile(user)
+        youth_profile.school_name = "Changed school"
+        youth_profile.save()
+        return loaded
+
+    mocker.patch.object(cache, "_load_my_youth_profile", side_effect=load_and_change)
+    assert get_my_youth_profile(user).school_name == "Kontulan Alakoulu"
+    mocker.stopall()
+
+    assert get_my_youth_profile(user).school_name == "Changed school"
+
+
+def test_user_without_youth_profile_is_cached(user, django_assert_num_queries):
+    assert get_my_youth_profile(user) is None
+
+    with django_assert_num_queries(0):
+        assert get_my_youth_profile(user) is None
+
+
+def test_cache_hits_are_audit_logged(user, settings, caplog):
+    settings.AUDIT_LOGGING_ENABLED = True
+    youth_profile = YouthProfileFactory(user=user)
+    get_my_youth_profile(user)
+    caplog.clear()
+
+    get_my_youth_profile(user)
+
+    logs = [
+        json.loads(r[2])
+        for r in caplog.record_tuples
+        if r[0] == "common_utils.audit_logging" and r[1] == logging.INFO
+    ]
+    assert len(logs) == 1
+    assert logs[0]["audit_event"]["operation"] == "READ"
+    assert logs[0]["audit_event"]["target"]["profile_id"] == str(youth_profile.pk)
@@ -1,8 +1,325 @@
+import json
+import socket
+from datetime import date
+from io import StringIO
+
+import pytest
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from django.core.management import call_command
+from django.core.management import call_command, CommandError
+from django.utils import timezone
+from helusers.models import ADGroupMapping
+
+from youths.importer import iter_json_array, read_records
+from youths.models import AdditionalContactPerson, SeasonRenewal, YouthProfile
+from youths.tests.factories import YouthProfileFactory
 
 
 def test_command_seed_data_creates_admin_group():
     call_command("seed_data")
 
     assert Group.objects.count() == 1
+
+
+IMPORTED_USER_UUID = "4f5a6e20-3b8c-4b5e-9c0e-1d0b2e3f4a5b"
+IMPORTED_PROFILE_UUID = "9a8b7c6d-5e4f-4a3b-8c2d-1e0f9a8b7c6d"
+
+
+@pytest.fixture
+def youth_data_file(tmp_path):
+    data = [{"model": "helusers.adgroup", "fields": {"name": "ad-group"}}]
+    data += [
+        {
+            "model": "users.user",
+            "fields": {
+                "username": f"user-{i}",
+                "uuid": IMPORTED_USER_UUID
+                if i == 0
+                else f"{i:08}-0000-4000-8000-000000000000",
+                "first_name": "Teppo",
+                "ad_groups": [["ad-group"]],
+            },
+        }
+        for i in range(5)
+    ]
+    data += [
+        {
+            "model": "youths.youthprofile",
+            "pk": IMPORTED_PROFILE_UUID,
+            "fields": {
+                "user": [IMPORTED_USER_UUID],
+                "membership_number": "000042",
+                "birth_date": "2005-01-01",
+                "expiration": "2021-08-31",
+                "language_at_home": "sv",
+                "approval_token": "1234",
+                "approved_time": "2020-08-01T12:00:00Z",
+            },
+        },
+        {
+            "model": "youths.additionalcontactperson",
+            "fields": {
+                "youth_profile": [IMPORTED_PROFILE_UUID],
+                "first_name": "Taina",
+                "last_name": "Testinen",
+                "phone": "0401234567",
+                "email": "taina@example.com",
+            },
+        },
+    ]
+    filename = tmp_path / "youth_data.json"
+    filename.write_text(json.dumps(data, indent=2))
+    return str(filename)
+
+
+def assert_youth_data_imported(output):
+    assert get_user_model().objects.filter(ad_groups__name="ad-group").count() == 5
+    youth_profile = YouthProfile.objects.get(pk=IMPORTED_PROFILE_UUID)
+    assert str(youth_profile.user.uuid) == IMPORTED_USER_UUID
+    assert youth_profile.membership_number == "000042"
+    assert youth_profile.approval_token == ""
+    assert AdditionalContactPerson.objects.get().youth_profile == youth_profile
+    assert ADGroupMapping.objects.count() == 1
+    assert YouthProfile.membership_number_sequence.get_next_value() > 42
+    assert "Successfully read 5 users and 1 youth profiles" in output
+
+
+def test_command_import_youth_data_creates_objects_in_bulk(
+    youth_data_file, django_assert_max_num_queries
+):
+    out = StringIO()
+
+    with django_assert_max_num_queries(30):
+        call_command("import_youth_data", youth_data_file, chunk_size=2, stdout=out)
+
+    assert_youth_data_imported(out.getvalue())
+
+
+def test_command_import_youth_data_with_workers(youth_data_file, transactional_db):
+    out = StringIO()
+
+    call_command(
+        "import_youth_data", youth_data_file, chunk_size=2, workers=2, stdout=out
+    )
+
+    assert_youth_data_imported(out.getvalue())
+    assert "Stage users: 5 created" in out.getvalue()
+    assert "Stage contact persons: 1 created" in out.getvalue()
+
+
+def test_command_import_youth_data_incremental_writes_only_changes(
+    youth_data_file, django_assert_max_num_queries
+):
+    call_command("import_youth_data", youth_data_file, stdout=StringIO())
+    with open(youth_data_file) as infile:
+        data = json.load(infile)
+    removed_user, changed_user = data[2], data[3]
+    data.remove(removed_user)
+    changed_user["fields"]["first_name"] = "Seppo"
+    # Fields missing from the earlier records are imported too
+    changed_user["fields"]["email"] = "seppo@example.com"
+    with open(youth_data_file, "w") as outfile:
+        json.dump(data, outfile)
+    out = StringIO()
+
+    with django_assert_max_num_queries(40):
+        call_command("import_youth_data", youth_data_file, incremental=True, stdout=out)
+
+    users = get_user_model().objects.all()
+    assert not users.filter(uuid=removed_user["fields"]["uuid"]).exists()
+    changed = users.get(uuid=changed_user["fields"]["uuid"])
+    assert changed.first_name == "Seppo"
+    assert changed.email == "seppo@example.com"
+    assert users.count() == 4
+    assert YouthProfile.objects.count() == 1
+    assert AdditionalContactPerson.objects.count() == 1
+    assert ADGroupMapping.objects.count() == 1
+    output = out.getvalue()
+    assert "Users: 0 created, 1 updated, 3 unchanged, 1 deleted" in output
+    assert "Youth profiles: 0 created, 0 updated, 1 unchanged, 0 deleted" in output
+
+
+def test_command_import_youth_data_incremental_keeps_fields_missing_from_records(
+    youth_data_file,
+):
+    call_command("import_youth_data", youth_data_file, stdout=StringIO())
+    users = get_user_model().objects.all()
+    users.update(last_name="Stored")
+    dates_joined = set(users.values_list("date_joined", flat=True))
+    YouthProfile.objects.update(school_name="Stored school")
+    out = StringIO()
+
+    call_command("import_youth_data", youth_data_file, incremental=True, stdout=out)
+
+    assert set(users.values_list("last_name", flat=True)) == {"Stored"}
+    assert set(users.values_list("date_joined", flat=True)) == dates_joined
+    assert YouthProfile.objects.get().school_name == "Stored school"
+    output = out.getvalue()
+    assert "Users: 0 created, 0 updated, 5 unchanged, 0 deleted" in output
+    assert "Youth profiles: 0 created, 0 updated, 1 unchanged, 0 deleted" in output
+
+
+def test_command_export_youth_data_writes_importable_shards(youth_data_file, tmp_path):
+    call_command("import_youth_data", youth_data_file, stdout=StringIO())
+    out = StringIO()
+
+    call_command(
+        "export_youth_data",
+        str(tmp_path / "export.json"),
+        gzip=True,
+        shard_size=3,
+        stdout=out,
+    )
+
+    shards = sorted(str(path) for path in tmp_path.glob("export-*.json.gz"))
+    assert len(shards) == 3
+    assert "5 users, 1 youth profiles" in out.getvalue()
+    users = [
+        record["fields"]
+        for record in read_records(shards)
+        if record["model"] == "users.user"
+    ]
+    assert len(users) == 5
+    # Passwords, groups and permissions are not exported
+    assert not {"password", "groups", "user_permissions"} & set(users[0])
+    out = StringIO()
+    call_command("import_youth_data", *shards, stdout=out)
+    assert_youth_data_imported(out.getvalue())
+
+
+def test_command_generate_youth_data_is_deterministic():
+    options = {"profiles": 20, "seed": 1, "chunk_size": 8, "today": date(2020, 10, 1)}
+
+    def generated():
+        return list(
+            YouthProfile.objects.order_by("user__username").values_list(
+                "user__uuid", "birth_date", "expiration", "approved_time"
+            )
+        )
+
+    call_command("generate_youth_data", **options, stdout=StringIO())
+    first = generated()
+    get_user_model().objects.all().delete()
+    call_command("generate_youth_data", **options, stdout=StringIO())
+
+    assert len(first) == 20
+    assert generated() == first
+    assert AdditionalContactPerson.objects.exists()
+
+
+def test_iter_json_array_reads_items_split_between_reads():
+    items = [{"model": "youths.youthprofile", "fields": {"school_name": "[a], {b}"}}]
+
+    assert list(iter_json_array(StringIO(json.dumps(items * 3)), read_size=5)) == (
+        items * 3
+    )
+
+
+def test_command_benchmark_approval_token_lookup_rolls_back_synthetic_data():
+    out = StringIO()
+
+    call_command(
+        "benchmark_approval_token_lookup",
+        rows=100,
+        lookups=5,
+        baseline_lookups=2,
+        stdout=out,
+    )
+
+    output = out.getvalue()
+    assert "Indexed lookup: 5 lookups" in output
+    assert "Sequential scan: 2 lookups" in output
+    assert YouthProfile.objects.count() == 0
+
+
+@pytest.fixture
+def profile_api_stub_url(settings):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    settings.HELSINKI_PROFILE_API_URL = f"http://127.0.0.1:{port}/"
+
+
+def test_command_benchmark_signup_burst_reports_anomalies(
+    profile_api_stub_url, transactional_db
+):
+    out = StringIO()
+
+    call_command(
+        "benchmark_signup_burst",
+        signups=6,
+        concurrency=3,
+        profile_api_latency=0,
+        stdout=out,
+    )
+
+    output = out.getvalue()
+    assert "6 signups" in output
+    assert "6 succeeded" in output
+    assert "Membership numbers: 0 duplicates" in output
+    assert YouthProfile.objects.count() == 0
+
+
+def test_command_benchmark_signup_burst_without_signups(
+    profile_api_stub_url, transactional_db
+):
+    out = StringIO()
+
+    call_command("benchmark_signup_burst", signups=0, stdout=out)
+
+    assert "0 signups" in out.getvalue()
+
+
+def test_command_benchmark_signup_burst_requires_a_local_profile_api_url():
+    with pytest.raises(CommandError):
+        call_command("benchmark_signup_burst", signups=1, stdout=StringIO())
+
+
+def test_command_renew_memberships_renews_approved_memberships():
+    expiring_on = date(2020, 8, 31)
+    new_expiration = date(2021, 8, 31)
+    adult = YouthProfileFactory(
+        birth_date=date(2000, 1, 1),
+        expiration=expiring_on,
+        approved_time=timezone.now(),
+    )
+    minor = YouthProfileFactory(
+        birth_date=date.today() - relativedelta(years=15),
+        expiration=expiring_on,
+        approved_time=timezone.now(),
+    )
+    unapproved = YouthProfileFactory(expiration=expiring_on, approved_time=None)
+    out = StringIO()
+
+    call_command(
+        "renew_memberships",
+        expiring_on=expiring_on,
+        new_expiration=new_expiration,
+        chunk_size=1,
+        stdout=out,
+    )
+
+    adult.refresh_from_db()
+    minor.refresh_from_db()
+    unapproved.refresh_from_db()
+    assert adult.expiration == new_expiration
+    assert adult.approval_token == ""
+    # Minors renew their memberships themselves to get their guardian's approval
+    assert minor.expiration == expiring_on
+    assert unapproved.expiration == expiring_on
+    season_renewal = SeasonRenewal.objects.get(expiring_on=expiring_on)
+    assert season_renewal.renewed == 1
+    assert season_renewal.finished_at
+    assert "Renewed 1 memberships" in out.getvalue()
+
+    out = StringIO()
+    call_command(
+        "renew_memberships",
+        expiring_on=expiring_on,
+        new_expiration=new_expiration,
+        stdout=out,
+    )
+
+    assert "Continuing the renewal" in out.getvalue()
+    assert "Renewed 0 memberships" in out.getvalue()
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+
+import pytest
+from django.urls import reverse
+
+from .factories import AdditionalContactPersonFactory, YouthProfileFactory
+
+
+def get_streamed_content(response):
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+def test_anonymous_user_cannot_export_youth_profiles(api_client):
+    response = api_client.get(reverse("youth_profile_export"))
+
+    assert response.status_code == 401
+
+
+def test_normal_user_cannot_export_youth_profiles(api_client, user):
+    api_client.force_authenticate(user=user)
+
+    response = api_client.get(reverse("youth_profile_export"))
+
+    assert response.status_code == 403
+
+
+def test_staff_user_can_export_youth_profiles_as_ndjson(
+    api_client, staff_user, settings
+):
+    settings.YOUTH_PROFILE_EXPORT_CHUNK_SIZE = 2
+    youth_profiles = YouthProfileFactory.create_batch(3)
+    contact_person = AdditionalContactPersonFactory(youth_profile=youth_profiles[0])
+    api_client.force_authenticate(user=staff_user)
+
+    response = api_client.get(reverse("youth_profile_export"))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in get_streamed_content(response).splitlines()]
+    assert {row["id"] for row in rows} == {str(yp.pk) for yp in youth_profiles}
+    row = next(row for row in rows if row["id"] == str(youth_profiles[0].pk))
+    assert row["membership_number"] == youth_profiles[0].membership_number
+    assert row["language_at_home"] == youth_profiles[0].language_at_home.value
+    assert row["additional_contact_persons"] == [
+        {
+            "first_name": contact_person.first_name,
+            "last_name": contact_person.last_name,
+            "phone": contact_person.phone,
+            "email": contact_person.email,
+        }
+    ]
+
+
+def test_staff_user_can_export_youth_profiles_as_csv(api_client, staff_user):
+    youth_profile = YouthProfileFactory()
+    api_client.force_authenticate(user=staff_user)
+
+    response = api_client.get(reverse("youth_profile_export"), {"output": "csv"})
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(get_streamed_content(response))))
+    assert len(rows) == 1
+    assert rows[0]["id"] == str(youth_profile.pk)
+    assert rows[0]["membership_number"] == youth_profile.membership_number
+    assert json.loads(rows[0]["additional_contact_persons"]) == []
+
+
+def test_unknown_export_format_is_rejected(api_client, staff_user):
+    api_client.force_authenticate(user=staff_user)
+
+    response = api_client.get(reverse("youth_profile_export"), {"output": "xml"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("chunk_size,expected_events", [(2, 2), (10, 1)])
+def test_export_logs_one_audit_event_per_chunk(
+    api_client, staff_user, settings, caplog, chunk_size, expected_events
+):
+    settings.AUDIT_LOGGING_ENABLED = True
+    settings.YOUTH_PROFILE_EXPORT_CHUNK_SIZE = chunk_size
+    youth_profiles = YouthProfileFactory.create_batch(3)
+    api_client.force_authenticate(user=staff_user)
+    caplog.clear()
+
+    response = api_client.get(reverse("youth_profile_export"))
+    get_streamed_content(response)
+
+    events = [
+        json.loads(record.getMessage())["audit_event"]
+        for record in caplog.records
+        if record.name == "common_utils.audit_logging"
+    ]
+    assert len(events) == expected_events
+    assert all(event["operation"] == "READ" for event in events)
+    assert all(event["actor"]["user_id"] == str(staff_user.uuid) for event in events)
+    exported_ids = {pid for event in events for pid in event["target"]["profile_ids"]}
+    assert exported_ids == {str(yp.pk) for yp in youth_profiles}
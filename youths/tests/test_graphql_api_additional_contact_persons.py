@@ -1,7 +1,9 @@
 from string import Template
 
+import pytest
 from graphql_relay import to_global_id
 
+from common_utils.exceptions import InvalidEmailFormatError
 from common_utils.profile import ProfileAPI
 from youths.models import AdditionalContactPerson
 from youths.tests.factories import (
@@ -9,6 +11,7 @@ from youths.tests.factories import (
     AdditionalContactPersonFactory,
     YouthProfileFactory,
 )
+from youths.utils import create_or_update_contact_persons, delete_contact_persons
 
 ADDITIONAL_CONTACT_PERSONS_QUERY_BASE = Template(
     """
@@ -253,3 +256,61 @@ def test_profile_approval_allows_changing_contact_persons(
     assert youth_profile.additional_contact_persons.exclude(
         pk__in=[acp_update.pk, acp_remove.pk]
     ).exists()
+
+
+def test_contact_persons_are_written_with_constant_number_of_queries(
+    django_assert_num_queries,
+):
+    youth_profile = YouthProfileFactory()
+    acps = AdditionalContactPersonFactory.create_batch(5, youth_profile=youth_profile)
+    new_acps = [
+        {
+            "first_name": f"New {i}",
+            "last_name": "Person",
+            "phone": "0401234567",
+            "email": f"new{i}@example.com",
+        }
+        for i in range(5)
+    ]
+    updated_acps = [
+        {
+            "id": to_global_id("AdditionalContactPersonNode", acp.pk),
+            "last_name": "Updated",
+        }
+        for acp in acps
+    ]
+
+    with django_assert_num_queries(1):
+        create_or_update_contact_persons(youth_profile, new_acps)
+    with django_assert_num_queries(2):
+        create_or_update_contact_persons(youth_profile, updated_acps)
+
+    assert set(
+        youth_profile.additional_contact_persons.values_list("last_name", flat=True)
+    ) == {"Person", "Updated"}
+
+    with django_assert_num_queries(2):
+        delete_contact_persons(
+            youth_profile,
+            [to_global_id("AdditionalContactPersonNode", acp.pk) for acp in acps],
+        )
+
+    assert youth_profile.additional_contact_persons.count() == 5
+
+
+def test_invalid_contact_person_email_prevents_writing_any_contact_persons():
+    youth_profile = YouthProfileFactory()
+    acps = [
+        {
+            "first_name": "Valid",
+            "last_name": "Person",
+            "phone": "040",
+            "email": "a@b.fi",
+        },
+        {"first_name": "Invalid", "last_name": "Person", "phone": "040", "email": "a"},
+    ]
+
+    with pytest.raises(InvalidEmailFormatError):
+        create_or_update_contact_persons(youth_profile, acps)
+
+    assert not youth_profile.additional_contact_persons.exists()
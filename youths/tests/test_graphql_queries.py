@@ -3,9 +3,12 @@ import uuid
 from string import Template
 
 import pytest
+from django.utils import timezone
+from graphql_relay.connection.arrayconnection import offset_to_cursor
 from graphql_relay.node.node import to_global_id
 
 from common_utils.consts import PERMISSION_DENIED_ERROR
+from youths.enums import YouthLanguage
 from youths.tests.factories import YouthProfileFactory
 
 
@@ -314,3 +317,262 @@ def test_staff_user_can_filter_all_youth_profiles(rf, staff_user_gql_client):
     executed = staff_user_gql_client.execute(query, context=request)
     assert executed["data"]["youthProfiles"]["totalCount"] == 3
     assert executed["data"]["youthProfiles"]["count"] == 1
+
+
+SEARCH_QUERY = """
+    query YouthProfiles($search: String) {
+        youthProfiles(search: $search) {
+            edges {
+                node {
+                    schoolName
+                }
+            }
+        }
+    }
+"""
+
+
+def test_staff_user_can_search_youth_profiles(rf, staff_user_gql_client):
+    request = rf.post("/graphql")
+    request.user = staff_user_gql_client.user
+    YouthProfileFactory(school_name="Kallion lukio")
+    YouthProfileFactory(school_name="Other school", user__last_name="Kallinen")
+    YouthProfileFactory(
+        school_name="Third school",
+        user__first_name="Matti",
+        user__last_name="Virtanen",
+        user__email="matti@example.com",
+    )
+
+    executed = staff_user_gql_client.execute(
+        SEARCH_QUERY, variables={"search": "kALLI"}, context=request
+    )
+
+    school_names = {
+        edge["node"]["schoolName"]
+        for edge in executed["data"]["youthProfiles"]["edges"]
+    }
+    assert school_names == {"Kallion lukio", "Other school"}
+
+
+def test_staff_user_can_filter_youth_profiles_by_membership_status(
+    rf, staff_user_gql_client
+):
+    request = rf.post("/graphql")
+    request.user = staff_user_gql_client.user
+    YouthProfileFactory(school_name="Approved school", approved_time=timezone.now())
+    YouthProfileFactory(school_name="Pending school", approved_time=None)
+
+    query = """
+        query {
+            youthProfiles(membershipStatus: "PENDING", renewable: false) {
+                edges {
+                    node {
+                        schoolName
+                        membershipStatus
+                    }
+                }
+            }
+        }
+    """
+    executed = staff_user_gql_client.execute(query, context=request)
+
+    assert executed["data"]["youthProfiles"]["edges"] == [
+        {"node": {"schoolName": "Pending school", "membershipStatus": "PENDING"}}
+    ]
+
+
+def test_staff_user_can_order_youth_profiles_by_membership_status(
+    rf, staff_user_gql_client
+):
+    request = rf.post("/graphql")
+    request.user = staff_user_gql_client.user
+    YouthProfileFactory(school_name="Pending school", approved_time=None)
+    YouthProfileFactory(
+        school_name="Expired school",
+        approved_time=timezone.now(),
+        expiration=datetime.date(2020, 8, 31),
+    )
+    YouthProfileFactory(school_name="Approved school", approved_time=timezone.now())
+
+    query = """
+        query OrderedYouthProfiles($orderBy: String) {
+            youthProfiles(orderBy: $orderBy) {
+                edges {
+                    node {
+                        membershipStatus
+                    }
+                }
+            }
+        }
+    """
+
+    for order_by, expected_statuses in (
+        ("membershipStatus", ["PENDING", "ACTIVE", "EXPIRED"]),
+        ("-membershipStatus", ["EXPIRED", "ACTIVE", "PENDING"]),
+    ):
+        executed = staff_user_gql_client.execute(
+            query, variables={"orderBy": order_by}, context=request
+        )
+        statuses = [
+            edge["node"]["membershipStatus"]
+            for edge in executed["data"]["youthProfiles"]["edges"]
+        ]
+        assert statuses == expected_statuses
+
+
+def test_staff_user_can_filter_youth_profile_work_queue(rf, staff_user_gql_client):
+    request = rf.post("/graphql")
+    request.user = staff_user_gql_client.user
+    YouthProfileFactory(
+        school_name="Kallion lukio",
+        birth_date="2006-06-06",
+        language_at_home=YouthLanguage.SWEDISH,
+        approved_time=None,
+    )
+    YouthProfileFactory(
+        school_name="Kallion lukio",
+        birth_date="2006-06-06",
+        language_at_home=YouthLanguage.SWEDISH,
+        approved_time=timezone.now(),
+    )
+    YouthProfileFactory(
+        school_name="Kallion lukio",
+        birth_date="2000-01-01",
+        language_at_home=YouthLanguage.SWEDISH,
+        approved_time=None,
+    )
+    YouthProfileFactory(
+        school_name="Kallion lukio",
+        birth_date="2006-06-06",
+        language_at_home=YouthLanguage.FINNISH,
+        approved_time=None,
+    )
+
+    query = """
+        query {
+            youthProfiles(
+                schoolName: "kallion"
+                birthDateFrom: "2006-01-01"
+                birthDateTo: "2006-12-31"
+                languageAtHome: "SWEDISH"
+                approved: false
+            ) {
+                edges {
+                    node {
+                        birthDate
+                        languageAtHome
+                        approvedTime
+                    }
+                }
+            }
+        }
+    """
+    executed = staff_user_gql_client.execute(query, context=request)
+
+    assert executed["data"]["youthProfiles"]["edges"] == [
+        {
+            "node": {
+                "birthDate": "2006-06-06",
+                "languageAtHome": "SWEDISH",
+                "approvedTime": None,
+            }
+        }
+    ]
+
+
+TOTAL_COUNT_QUERY = """
+    query {
+        youthProfiles {
+            totalCount
+            count
+        }
+    }
+"""
+
+
+def test_youth_profiles_total_count_is_cached(rf, staff_user_gql_client):
+    request = rf.post("/graphql")
+    request.user = staff_user_gql_client.user
+    YouthProfileFactory.create_batch(2)
+
+    executed = staff_user_gql_client.execute(TOTAL_COUNT_QUERY, context=request)
+    assert executed["data"]["youthProfiles"]["totalCount"] == 2
+
+    YouthProfileFactory()
+
+    executed = staff_user_gql_client.execute(TOTAL_COUNT_QUERY, context=request)
+    assert executed["data"]["youthProfiles"]["totalCount"] == 2
+    assert executed["data"]["youthProfiles"]["count"] == 3
+
+
+def test_youth_profiles_total_count_uses_estimate_for_large_tables(
+    rf, staff_user_gql_client, settings, mocker
+):
+    settings.GRAPHQL_TOTAL_COUNT_EXACT_THRESHOLD = 1000
+    mocker.patch("common_utils.graphql.estimate_row_count", return_value=123456)
+    request = rf.post("/graphql")
+    request.user = staff_user_gql_client.user
+    YouthProfileFactory()
+
+    executed = staff_user_gql_client.execute(TOTAL_COUNT_QUERY, context=request)
+    assert executed["data"]["youthProfiles"]["totalCount"] == 123456
+    assert executed["data"]["youthProfiles"]["count"] == 1
+
+
+KEYSET_PAGE_QUERY = """
+    query($after: String) {
+        youthProfiles(keyset: true, first: 2, after: $after) {
+            count
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+            edges {
+                cursor
+                node {
+                    membershipNumber
+                }
+            }
+        }
+    }
+"""
+
+
+def test_staff_user_can_page_youth_profiles_with_keyset_cursors(
+    rf, staff_user_gql_client
+):
+    request = rf.post("/graphql")
+    request.user = staff_user_gql_client.user
+    youth_profiles = YouthProfileFactory.create_batch(5)
+    expected_numbers = sorted(yp.membership_number for yp in youth_profiles)
+
+    membership_numbers = []
+    after = None
+    for _ in range(3):
+        executed = staff_user_gql_client.execute(
+            KEYSET_PAGE_QUERY, variables={"after": after}, context=request
+        )
+        connection = executed["data"]["youthProfiles"]
+        assert connection["count"] == 5
+        membership_numbers += [
+            edge["node"]["membershipNumber"] for edge in connection["edges"]
+        ]
+        after = connection["pageInfo"]["endCursor"]
+
+    assert membership_numbers == expected_numbers
+    assert connection["pageInfo"]["hasNextPage"] is False
+
+
+def test_keyset_pagination_rejects_offset_cursors(rf, staff_user_gql_client):
+    request = rf.post("/graphql")
+    request.user = staff_user_gql_client.user
+    YouthProfileFactory.create_batch(2)
+
+    executed = staff_user_gql_client.execute(
+        KEYSET_PAGE_QUERY,
+        variables={"after": offset_to_cursor(0)},
+        context=request,
+    )
+    assert executed["data"]["youthProfiles"] is None
+    assert "Invalid cursor" in executed["errors"][0]["message"]
@@ -3,14 +3,18 @@ import datetime
 import pytest
 import pytz
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
+from django.db import connection, IntegrityError
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 
 from youths.enums import MembershipStatus
+from youths.membership_numbers import MembershipNumberSequence
 from youths.models import YouthProfile
-from youths.tests.factories import AdditionalContactPersonFactory
+from youths.tests.factories import AdditionalContactPersonFactory, YouthProfileFactory
 from youths.utils import generate_admin_group, user_is_admin
 
 
@@ -71,14 +75,33 @@ def test_serialize_additional_contact_person():
         assert d in serialized_acd["children"]
 
 
+def test_partial_save_validates_only_saved_fields(youth_profile):
+    youth_profile.approver_email = "notanemail"
+
+    youth_profile.save(update_fields=["expiration"])
+
+    with pytest.raises(ValidationError):
+        youth_profile.save(update_fields=["approver_email"])
+
+
+def test_saving_youth_profile_does_not_query_for_validation(
+    youth_profile, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        youth_profile.save(update_fields=["expiration"])
+
+    with django_assert_num_queries(1):
+        youth_profile.save()
+
+
 def test_membership_number_is_generated_for_new_profile(settings, youth_profile):
     sequence_value = YouthProfile.membership_number_sequence.get_last_value()
     expected_number = str(sequence_value).zfill(settings.YOUTH_MEMBERSHIP_NUMBER_LENGTH)
 
-    # Post save signal sets the membership number
+    # Saving sets the membership number
     assert youth_profile.membership_number == expected_number
 
-    # Post save signal saves the membership number into the DB
+    # The membership number is saved into the DB
     youth_profile.refresh_from_db()
     assert youth_profile.membership_number == expected_number
 
@@ -96,6 +119,37 @@ def test_membership_number_is_generated_for_existing_profile(settings, youth_pro
     assert youth_profile.membership_number == expected_number
 
 
+def test_membership_number_is_inserted_without_extra_update():
+    with CaptureQueriesContext(connection) as context:
+        youth_profile = YouthProfileFactory()
+
+    assert youth_profile.membership_number
+    assert not [q for q in context.captured_queries if q["sql"].startswith("UPDATE")]
+
+
+def test_membership_numbers_are_reserved_in_blocks(settings, django_assert_num_queries):
+    settings.YOUTH_MEMBERSHIP_NUMBER_BLOCK_SIZE = 3
+    sequence = MembershipNumberSequence("youths_membership_number_seq")
+
+    with django_assert_num_queries(1):
+        values = [sequence.get_next_value() for _ in range(3)]
+    with django_assert_num_queries(1):
+        values.append(sequence.get_next_value())
+
+    assert values == sorted(set(values))
+    assert sequence.get_last_value() == values[-1]
+
+
+def test_membership_number_sequence_is_not_moved_back():
+    sequence = MembershipNumberSequence("youths_membership_number_seq")
+    sequence.set_last_value(1000)
+    assert sequence.get_next_value() == 1001
+
+    sequence.set_last_value(10)
+
+    assert sequence.get_next_value() > 1001
+
+
 def test_membership_number_is_not_changed_when_saving(youth_profile):
     expected_number = "MEMBER123"
 
@@ -126,114 +180,116 @@ def test_additional_contact_person_runs_full_clean_when_saving(youth_profile):
         acp.save()
 
 
+MEMBERSHIP_STATUS_CASES = [
+    # Past the full season renewal date (approval)
+    (
+        "2020-05-10",
+        datetime.datetime(2019, 8, 1),
+        datetime.date(2020, 8, 31),
+        MembershipStatus.ACTIVE,
+        True,
+    ),
+    # Not yet past the full season renewal date
+    (
+        "2020-04-11",
+        datetime.datetime(2019, 8, 1),
+        datetime.date(2020, 8, 31),
+        MembershipStatus.ACTIVE,
+        False,
+    ),
+    # Waiting for approval by a guardian
+    (
+        "2020-05-12",
+        None,
+        datetime.date(2020, 8, 31),
+        MembershipStatus.PENDING,
+        False,
+    ),
+    # Past the expiration date
+    (
+        "2019-09-01",
+        datetime.datetime(2019, 1, 1),
+        datetime.date(2019, 8, 31),
+        MembershipStatus.EXPIRED,
+        True,
+    ),
+    # Expired pending registration
+    (
+        "2020-05-14",
+        None,
+        datetime.date(2019, 8, 31),
+        MembershipStatus.EXPIRED,
+        True,
+    ),
+    # Stale renewal i.e. has already expired
+    (
+        "2020-09-15",
+        datetime.datetime(2019, 4, 30),
+        datetime.date(2020, 8, 31),
+        MembershipStatus.EXPIRED,
+        True,
+    ),
+    # Approved after already expired
+    (
+        "2020-09-16",
+        datetime.datetime(2020, 9, 16),
+        datetime.date(2020, 8, 31),
+        MembershipStatus.EXPIRED,
+        True,
+    ),
+    # Full season renewal (next year)
+    (
+        "2020-05-17",
+        datetime.datetime(2020, 1, 1),
+        datetime.date(2021, 8, 31),
+        MembershipStatus.RENEWING,
+        False,
+    ),
+    # Full season renewal (next year), membership has expired, but renewal waiting for approval
+    (
+        "2020-09-01",
+        datetime.datetime(2020, 1, 1),
+        datetime.date(2021, 8, 31),
+        MembershipStatus.PENDING,
+        False,
+    ),
+    # Short season renewal, membership is expired, but it's waiting for approval
+    (
+        "2020-04-18",
+        datetime.datetime(2019, 1, 1),
+        datetime.date(2020, 8, 31),
+        MembershipStatus.PENDING,
+        False,
+    ),
+    # Last day of validity
+    (
+        "2020-08-31",
+        datetime.datetime(2019, 8, 1),
+        datetime.date(2020, 8, 31),
+        MembershipStatus.ACTIVE,
+        True,
+    ),
+    # Cancelled membership (calculated expiration, based on approved time, is after the expiration date)
+    (
+        "2020-05-15",
+        datetime.datetime(2020, 1, 1),
+        datetime.date(2020, 5, 14),
+        MembershipStatus.EXPIRED,
+        True,
+    ),
+    # Cancelled to a specific date, but still valid
+    (
+        "2020-05-15",
+        datetime.datetime(2020, 1, 1),
+        datetime.date(2020, 5, 16),
+        MembershipStatus.ACTIVE,
+        True,
+    ),
+]
+
+
 @pytest.mark.parametrize(
-    "current_date,approved_time,expiration,status,renewable",
-    [
-        # Past the full season renewal date (approval)
-        (
-            "2020-05-10",
-            datetime.datetime(2019, 8, 1),
-            datetime.date(2020, 8, 31),
-            MembershipStatus.ACTIVE,
-            True,
-        ),
-        # Not yet past the full season renewal date
-        (
-            "2020-04-11",
-            datetime.datetime(2019, 8, 1),
-            datetime.date(2020, 8, 31),
-            MembershipStatus.ACTIVE,
-            False,
-        ),
-        # Waiting for approval by a guardian
-        (
-            "2020-05-12",
-            None,
-            datetime.date(2020, 8, 31),
-            MembershipStatus.PENDING,
-            False,
-        ),
-        # Past the expiration date
-        (
-            "2019-09-01",
-            datetime.datetime(2019, 1, 1),
-            datetime.date(2019, 8, 31),
-            MembershipStatus.EXPIRED,
-            True,
-        ),
-        # Expired pending registration
-        (
-            "2020-05-14",
-            None,
-            datetime.date(2019, 8, 31),
-            MembershipStatus.EXPIRED,
-            True,
-        ),
-        # Stale renewal i.e. has already expired
-        (
-            "2020-09-15",
-            datetime.datetime(2019, 4, 30),
-            datetime.date(2020, 8, 31),
-            MembershipStatus.EXPIRED,
-            True,
-        ),
-        # Approved after already expired
-        (
-            "2020-09-16",
-            datetime.datetime(2020, 9, 16),
-            datetime.date(2020, 8, 31),
-            MembershipStatus.EXPIRED,
-            True,
-        ),
-        # Full season renewal (next year)
-        (
-            "2020-05-17",
-            datetime.datetime(2020, 1, 1),
-            datetime.date(2021, 8, 31),
-            MembershipStatus.RENEWING,
-            False,
-        ),
-        # Full season renewal (next year), membership has expired, but renewal waiting for approval
-        (
-            "2020-09-01",
-            datetime.datetime(2020, 1, 1),
-            datetime.date(2021, 8, 31),
-            MembershipStatus.PENDING,
-            False,
-        ),
-        # Short season renewal, membership is expired, but it's waiting for approval
-        (
-            "2020-04-18",
-            datetime.datetime(2019, 1, 1),
-            datetime.date(2020, 8, 31),
-            MembershipStatus.PENDING,
-            False,
-        ),
-        # Last day of validity
-        (
-            "2020-08-31",
-            datetime.datetime(2019, 8, 1),
-            datetime.date(2020, 8, 31),
-            MembershipStatus.ACTIVE,
-            True,
-        ),
-        # Cancelled membership (calculated expiration, based on approved time, is after the expiration date)
-        (
-            "2020-05-15",
-            datetime.datetime(2020, 1, 1),
-            datetime.date(2020, 5, 14),
-            MembershipStatus.EXPIRED,
-            True,
-        ),
-        # Cancelled to a specific date, but still valid
-        (
-            "2020-05-15",
-            datetime.datetime(2020, 1, 1),
-            datetime.date(2020, 5, 16),
-            MembershipStatus.ACTIVE,
-            True,
-        ),
-    ],
+    "current_date,approved_time,expiration,status,renewable", MEMBERSHIP_STATUS_CASES
 )
 def test_youth_profile_should_show_correct_membership_status(
     rf, youth_profile, current_date, approved_time, expiration, status, renewable
@@ -249,6 +305,30 @@ def test_youth_profile_should_show_correct_membership_status(
         assert youth_profile.renewable == renewable
 
 
+@pytest.mark.parametrize(
+    "current_date,approved_time,expiration,status,renewable", MEMBERSHIP_STATUS_CASES
+)
+def test_membership_status_computed_in_database_matches_property(
+    youth_profile, current_date, approved_time, expiration, status, renewable
+):
+    youth_profile.approved_time = (
+        approved_time.replace(tzinfo=pytz.UTC) if approved_time else approved_time
+    )
+    youth_profile.expiration = expiration
+    youth_profile.save()
+
+    with freeze_time(current_date):
+        annotated = YouthProfile.objects.with_membership_status().get()
+        assert annotated.computed_membership_status == status.value
+        assert annotated.computed_renewable == renewable
+        for filtered_status in MembershipStatus:
+            assert YouthProfile.objects.filter_membership_status(
+                filtered_status
+            ).exists() == (filtered_status == status)
+        assert YouthProfile.objects.filter_renewable(renewable).exists()
+        assert not YouthProfile.objects.filter_renewable(not renewable).exists()
+
+
 @pytest.mark.parametrize(
     "possible_admin_user,is_admin",
     [
@@ -266,3 +346,47 @@ def test_generate_admin_group():
     generate_admin_group()
     group = Group.objects.first()
     assert group.name == settings.YOUTH_MEMBERSHIP_STAFF_GROUP
+
+
+def test_user_is_admin_is_memoized_for_the_user_instance(
+    staff_user, django_assert_num_queries
+):
+    with django_assert_num_queries(1):
+        assert user_is_admin(staff_user)
+        assert user_is_admin(staff_user)
+
+    # Another instance of the same user is served from the shared cache
+    user = get_user_model().objects.get(pk=staff_user.pk)
+    with django_assert_num_queries(0):
+        assert user_is_admin(user)
+
+
+def test_user_is_admin_cache_is_invalidated_when_user_groups_change(user, staff_group):
+    assert not user_is_admin(user)
+
+    user.groups.add(staff_group)
+    assert user_is_admin(user)
+
+    staff_group.user_set.remove(user)
+    assert not user_is_admin(get_user_model().objects.get(pk=user.pk))
+
+    staff_group.user_set.add(user)
+    assert user_is_admin(get_user_model().objects.get(pk=user.pk))
+
+    staff_group.user_set.clear()
+    assert not user_is_admin(get_user_model().objects.get(pk=user.pk))
+
+
+def test_approval_token_is_unique_when_set():
+    YouthProfileFactory(approval_token="token")
+
+    with pytest.raises(IntegrityError):
+        YouthProfileFactory(approval_token="token")
+
+
+def test_empty_approval_token_is_not_unique():
+    YouthProfileFactory(approval_token="")
+    YouthProfileFactory(approval_token="")
+
+    with pytest.raises(YouthProfile.DoesNotExist):
+        YouthProfile.objects.by_approval_token("")
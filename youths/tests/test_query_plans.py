@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from youths.enums import YouthLanguage
+from youths.models import YouthProfile
+from youths.schema.types import ProfileFilter
+
+SYNTHETIC_PROFILE_COUNT = 20000
+
+
+@pytest.fixture
+def synthetic_youth_profiles():
+    start = datetime.date(2020, 1, 1)
+    notified = timezone.now() - datetime.timedelta(days=30)
+    languages = list(YouthLanguage)
+    YouthProfile.objects.bulk_create(
+        YouthProfile(
+            membership_number=str(i).zfill(6),
+            birth_date=start - datetime.timedelta(days=i % 3650),
+            expiration=start + datetime.timedelta(days=i % 1000),
+            language_at_home=languages[i % len(languages)],
+            approval_notification_timestamp=notified + datetime.timedelta(minutes=i),
+            approved_time=None if i % 20 == 0 else notified,
+        )
+        for i in range(SYNTHETIC_PROFILE_COUNT)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {YouthProfile._meta.db_table}")
+
+
+@pytest.mark.parametrize(
+    "filters,index_names",
+    [
+        (
+            {"birth_date_from": "2015-01-01", "birth_date_to": "2015-01-07"},
+            {"youths_birth_date_idx"},
+        ),
+        (
+            {"expiration_from": "2021-01-01", "expiration_to": "2021-01-07"},
+            {"youths_expiration_approved_idx"},
+        ),
+        (
+            {
+                "language_at_home": "SWEDISH",
+                "expiration_from": "2021-01-01",
+                "expiration_to": "2021-01-07",
+            },
+            {"youths_language_expiration_idx", "youths_expiration_approved_idx"},
+        ),
+        (
+            {
+                "approved": False,
+                "approval_notification_before": (
+                    timezone.now() - datetime.timedelta(days=29)
+                ).isoformat(),
+            },
+            {"youths_unapproved_notified_idx", "youths_pending_approval_idx"},
+        ),
+        ({"membership_status": "ACTIVE"}, {"youths_expiration_approved_idx"}),
+        (
+            {"membership_status": "PENDING"},
+            {"youths_expiration_approved_idx", "youths_pending_approval_idx"},
+        ),
+    ],
+)
+def test_youth_profile_filters_use_indexes(
+    synthetic_youth_profiles, filters, index_names
+):
+    queryset = ProfileFilter(data=filters, queryset=YouthProfile.objects.all()).qs
+
+    plan = queryset.explain()
+
+    assert "Seq Scan" not in plan
+    assert any(index_name in plan for index_name in index_names), plan
+
+
+def test_youth_profile_keyset_pagination_uses_index(synthetic_youth_profiles):
+    queryset = YouthProfile.objects.order_by("membership_number", "id")[:10]
+
+    plan = queryset.explain()
+
+    assert "Seq Scan" not in plan
+    assert "youths_membership_keyset_idx" in plan, plan
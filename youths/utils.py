@@ -2,10 +2,13 @@ from datetime import date
 
 from django.conf import settings
 from django.contrib.auth.models import Group
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from graphql_relay import from_global_id
 
 from common_utils.exceptions import InvalidEmailFormatError
+from youths.cache import invalidate_my_youth_profile
 from youths.models import AdditionalContactPerson, YouthProfile
 
 
@@ -16,11 +19,51 @@ def generate_admin_group():
     return group
 
 
+STAFF_GROUP_MEMBER_CACHE_KEY = "youths:staff_group_member:{user_id}"
+
+# Attribute used for memoizing the staff group membership on the user instance
+STAFF_GROUP_MEMBER_ATTR = "_youth_membership_staff_group_member"
+
+
+def user_in_staff_group(user):
+    """Tell if the user belongs to the youth membership staff group.
+
+    The result is memoized on the user instance, which lives for one request,
+    and cached in the shared cache for a short while. The cache is invalidated
+    when the user's groups change.
+    """
+    if not hasattr(user, STAFF_GROUP_MEMBER_ATTR):
+        key = STAFF_GROUP_MEMBER_CACHE_KEY.format(user_id=user.pk)
+        is_member = cache.get(key)
+        if is_member is None:
+            is_member = user.groups.filter(
+                name=settings.YOUTH_MEMBERSHIP_STAFF_GROUP
+            ).exists()
+            cache.set(
+                key, is_member, settings.YOUTH_MEMBERSHIP_STAFF_GROUP_CACHE_TIMEOUT
+            )
+        setattr(user, STAFF_GROUP_MEMBER_ATTR, is_member)
+    return getattr(user, STAFF_GROUP_MEMBER_ATTR)
+
+
+def invalidate_user_in_staff_group(user_ids, user=None):
+    """Remove cached staff group memberships, now and after the transaction commits.
+
+    The second invalidation drops memberships cached by readers which loaded them
+    before the change was committed.
+    """
+    keys = [
+        STAFF_GROUP_MEMBER_CACHE_KEY.format(user_id=user_id) for user_id in user_ids
+    ]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    if user is not None and hasattr(user, STAFF_GROUP_MEMBER_ATTR):
+        delattr(user, STAFF_GROUP_MEMBER_ATTR)
+
+
 def user_is_admin(user):
     return user.is_active and (
-        user.is_superuser
-        or user.is_staff
-        or user.groups.filter(name=settings.YOUTH_MEMBERSHIP_STAFF_GROUP).exists()
+        user.is_superuser or user.is_staff or user_in_staff_group(user)
     )
 
 
@@ -33,33 +76,85 @@ def calculate_age(birth_date):
     )
 
 
+def _get_contact_persons(youth_profile: YouthProfile, ids):
+    """Return the youth profile's contact persons with the given IDs by ID."""
+    if not ids:
+        return {}
+    contact_persons = {
+        str(item.pk): item
+        for item in youth_profile.additional_contact_persons.filter(pk__in=ids)
+    }
+    if len(contact_persons) != len(ids):
+        raise AdditionalContactPerson.DoesNotExist(
+            "AdditionalContactPerson matching query does not exist."
+        )
+    return contact_persons
+
+
+def _validate_contact_person(item: AdditionalContactPerson):
+    try:
+        item.validate_fields()
+    except ValidationError as e:
+        if hasattr(e, "error_dict") and "email" in e.error_dict:
+            raise InvalidEmailFormatError("Email must be in valid email format")
+        else:
+            raise
+
+
 def create_or_update_contact_persons(youth_profile: YouthProfile, data):
+    """Create and update the youth profile's contact persons in bulk.
+
+    Contact persons to update are fetched with a single query and every contact
+    person is validated before any of them are written.
+    """
+    inputs = []
     for data_input in filter(None, data):
+        # id is required on update input
         acp_global_id = data_input.pop("id", None)
-        if acp_global_id:
-            # id is required on update input
-            acp_id = from_global_id(acp_global_id)[1]
-            item = AdditionalContactPerson.objects.get(
-                youth_profile=youth_profile, pk=acp_id
-            )
+        acp_id = from_global_id(acp_global_id)[1] if acp_global_id else None
+        inputs.append((acp_id, data_input))
+
+    existing = _get_contact_persons(
+        youth_profile, {acp_id for acp_id, data_input in inputs if acp_id}
+    )
+
+    to_create = []
+    to_update = []
+    updated_fields = set()
+    for acp_id, data_input in inputs:
+        if acp_id:
+            item = existing[acp_id]
+            to_update.append(item)
+            updated_fields.update(data_input)
         else:
             item = AdditionalContactPerson(youth_profile=youth_profile)
+            to_create.append(item)
 
         for field, value in data_input.items():
             setattr(item, field, value)
 
-        try:
-            item.save()
-        except ValidationError as e:
-            if hasattr(e, "error_dict") and "email" in e.error_dict:
-                raise InvalidEmailFormatError("Email must be in valid email format")
-            else:
-                raise
+        _validate_contact_person(item)
+
+    if to_create:
+        AdditionalContactPerson.objects.bulk_create(to_create)
+    if to_update and updated_fields:
+        AdditionalContactPerson.objects.bulk_update(to_update, updated_fields)
+    if to_create or to_update:
+        # Bulk operations don't send the signals which invalidate the cache
+        invalidate_my_youth_profile(youth_profile.user_id)
 
 
 def delete_contact_persons(youth_profile: YouthProfile, data):
-    for remove_global_id in filter(None, data):
-        remove_id = from_global_id(remove_global_id)[1]
-        AdditionalContactPerson.objects.get(
-            youth_profile=youth_profile, pk=remove_id
-        ).delete()
+    ids = {
+        from_global_id(remove_global_id)[1] for remove_global_id in filter(None, data)
+    }
+    if not ids:
+        return
+
+    # Instances from the related manager have the youth profile cached for the
+    # delete signals
+    deleted, _ = youth_profile.additional_contact_persons.filter(pk__in=ids).delete()
+    if deleted != len(ids):
+        raise AdditionalContactPerson.DoesNotExist(
+            "AdditionalContactPerson matching query does not exist."
+        )
@@ -0,0 +1,47 @@
+from django.http import StreamingHttpResponse
+from helusers.oidc import ApiTokenAuthentication
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
+
+from .export import export_csv, export_ndjson, iter_youth_profile_rows
+from .utils import user_is_admin
+
+EXPORT_FORMATS = {
+    "ndjson": (export_ndjson, "application/x-ndjson"),
+    "csv": (export_csv, "text/csv"),
+}
+
+
+class IsYouthMembershipStaff(BasePermission):
+    """Same check as the `staff_required` GraphQL decorator."""
+
+    def has_permission(self, request, view):
+        return user_is_admin(request.user)
+
+
+class YouthProfileExportView(APIView):
+    """Stream all youth profiles and their additional contact persons.
+
+    The format is chosen with the `output` query parameter, either `ndjson` (default)
+    or `csv`.
+    """
+
+    authentication_classes = (ApiTokenAuthentication, SessionAuthentication)
+    permission_classes = (IsYouthMembershipStaff,)
+
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get("output", "ndjson")
+        try:
+            serialize, content_type = EXPORT_FORMATS[output]
+        except KeyError:
+            raise ValidationError(
+                {"output": f"Unknown output format, use one of {list(EXPORT_FORMATS)}."}
+            )
+
+        rows = iter_youth_profile_rows(user=request.user)
+        response = StreamingHttpResponse(serialize(rows), content_type=content_type)
+        filename = f"youth_profiles.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response